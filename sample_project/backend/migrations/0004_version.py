@@ -0,0 +1,28 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_auto_20180923_1835'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='album',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='version'),
+        ),
+        migrations.AddField(
+            model_name='artist',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='version'),
+        ),
+        migrations.AddField(
+            model_name='song',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='version'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 2.1.5 on 2026-10-18 14:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+# Case-insensitive prefix search (see frontend.listing.SearchKey) can't be served
+# by a plain index; these indexes are specific to each database backend, and match
+# the SearchKey expression. Including the primary key, they also return the matches
+# already sorted by SearchKey and id
+CI_INDEXED_TABLES = ['backend_artist', 'backend_album', 'backend_song', ]
+CI_INDEX_SQL = {
+    'sqlite': 'CREATE INDEX %(table)s_description_ci ON %(table)s (description COLLATE NOCASE, id)',
+    'postgresql': 'CREATE INDEX %(table)s_description_ci ON %(table)s ((UPPER(description) COLLATE "C"), id)',
+}
+
+
+def create_ci_indexes(apps, schema_editor):
+    sql = CI_INDEX_SQL.get(schema_editor.connection.vendor)
+    if sql:
+        for table in CI_INDEXED_TABLES:
+            schema_editor.execute(sql % {'table': table})
+
+
+def drop_ci_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in CI_INDEX_SQL:
+        for table in CI_INDEXED_TABLES:
+            schema_editor.execute('DROP INDEX %s_description_ci' % table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='album',
+            name='artist',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='backend.Artist'),
+        ),
+        migrations.AlterField(
+            model_name='album',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='id'),
+        ),
+        migrations.AlterField(
+            model_name='artist',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='id'),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='album',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='backend.Album'),
+        ),
+        migrations.AlterField(
+            model_name='song',
+            name='id',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='id'),
+        ),
+        migrations.AddIndex(
+            model_name='album',
+            index=models.Index(fields=['artist', 'id'], name='backend_alb_artist__8e6bc7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['album', 'position', 'id'], name='backend_son_album_i_f11059_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='song',
+            index=models.Index(fields=['position', 'id'], name='backend_son_positio_6345fc_idx'),
+        ),
+        migrations.RunPython(create_ci_indexes, drop_ci_indexes),
+    ]
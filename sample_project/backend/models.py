@@ -1,11 +1,24 @@
 import uuid
 from django.core.exceptions import PermissionDenied
 from django.db import models
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
 from .utils import increment_revision
 
 
+# Max number of parent ids used in a single query when deep-cloning
+CLONE_BATCH_SIZE = 500
+
+
+class VersionConflict(Exception):
+    """
+    Raised by BaseModel.save() when the row has been changed (or deleted)
+    after the expected version was read
+    """
+    pass
+
+
 class BaseModel(models.Model):
     """
     Base class for all models; defines common metadata
@@ -14,9 +27,14 @@ class BaseModel(models.Model):
         abstract = True
 
     # Primary key
-    id = models.UUIDField('id', default=uuid.uuid4, primary_key=True, unique=True,
+    id = models.UUIDField('id', default=uuid.uuid4, primary_key=True,
         null=False, blank=False, editable=False)
     description = models.CharField('description', max_length=256, null=False, blank=False)
+    # Incremented at each update; used for optimistic concurrency control
+    version = models.PositiveIntegerField('version', default=1, null=False, blank=False, editable=False)
+
+    # Reverse relations whose objects are duplicated as well by a "deep" bulk_clone()
+    cloned_relations = []
 
     def __str__(self):
         text = str(self.id)
@@ -24,6 +42,117 @@ class BaseModel(models.Model):
             text = self.description
         return text
 
+    def save(self, *args, **kwargs):
+        """
+        When "expected_version" is supplied, the row is updated only if its version
+        still matches (in the same UPDATE statement); VersionConflict is raised otherwise
+        """
+        self._expected_version = kwargs.pop('expected_version', None)
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._expected_version = None
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # The version is incremented by the database (whichever fields are updated),
+        # so that concurrent unconditional updates are counted as well
+        version_field = self._meta.get_field('version')
+        values = [
+            (field, model, value)
+            for field, model, value in values
+            if field != version_field
+        ] + [(version_field, None, models.F('version') + 1), ]
+        expected_version = getattr(self, '_expected_version', None)
+        if expected_version is not None:
+            base_qs = base_qs.filter(version=expected_version)
+        updated = super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if updated and expected_version is not None:
+            self.version = expected_version + 1
+        elif updated:
+            # The row may have been changed since this instance was loaded, so the new
+            # version is unknown: defer it, to be loaded only if somebody reads it
+            self.__dict__.pop(version_field.attname, None)
+        elif expected_version is not None:
+            raise VersionConflict('%s "%s" has been changed or deleted' % (self._meta.verbose_name, self.pk))
+        return updated
+
+    @classmethod
+    def check_clone_permission(cls, request):
+        required_permission = '%s.add_%s' % (cls._meta.app_label, cls._meta.model_name)
+        if request and not request.user.has_perm(required_permission):
+            raise PermissionDenied
+
+    def build_clone(self, **values):
+        """
+        Returns an unsaved copy of this object with a new primary key;
+        "values" override the copied field values.
+
+        Related objects already loaded by this object are shared with the copy.
+        """
+        data = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if not field.primary_key and field.name != 'version'
+        }
+        data.update(values)
+        obj = self.__class__(**data)
+        for field in self._meta.concrete_fields:
+            if field.is_relation and field.attname not in values and field.is_cached(self):
+                field.set_cached_value(obj, field.get_cached_value(self))
+        return obj
+
+    def clone(self, request=None):
+        self.check_clone_permission(request)
+        obj = self.build_clone(description=increment_revision(self.description))
+        # The primary key is new: skip the UPDATE attempt
+        obj.save(force_insert=True)
+        return obj
+
+    @classmethod
+    def bulk_clone(cls, objects, request=None, deep=False):
+        """
+        Duplicate many objects at once with a single bulk_create();
+        when "deep" is True, related objects listed in "cloned_relations"
+        are duplicated as well, one bulk_create() per relation.
+
+        Returns the list of clones, in the same order as "objects".
+        """
+        objects = list(objects)
+        cls.check_clone_permission(request)
+        clones = [
+            obj.build_clone(description=increment_revision(obj.description))
+            for obj in objects
+        ]
+        with transaction.atomic():
+            cls.objects.bulk_create(clones)
+            if deep:
+                cls._bulk_clone_relations(objects, clones, request)
+        return clones
+
+    @classmethod
+    def _bulk_clone_relations(cls, objects, clones, request):
+        clone_ids = {obj.pk: clone.pk for obj, clone in zip(objects, clones)}
+        parent_ids = list(clone_ids.keys())
+        for name in cls.cloned_relations:
+            relation = cls._meta.get_field(name)
+            related_model = relation.related_model
+            related_model.check_clone_permission(request)
+            foreign_key = relation.field
+
+            children = []
+            for i in range(0, len(parent_ids), CLONE_BATCH_SIZE):
+                children += related_model.objects.filter(**{
+                    foreign_key.name + '__in': parent_ids[i:i + CLONE_BATCH_SIZE]
+                })
+            child_clones = [
+                child.build_clone(**{
+                    foreign_key.attname: clone_ids[getattr(child, foreign_key.attname)]
+                })
+                for child in children
+            ]
+            related_model.objects.bulk_create(child_clones)
+            related_model._bulk_clone_relations(children, child_clones, request)
+
 
 class Artist(BaseModel):
 
@@ -35,29 +164,50 @@ class Artist(BaseModel):
 
 class Album(BaseModel):
 
-    artist = models.ForeignKey(Artist, on_delete=models.CASCADE, null=False, blank=False)
+    # indexed below, together with the primary key
+    artist = models.ForeignKey(Artist, on_delete=models.CASCADE, null=False, blank=False, db_index=False)
     year = models.IntegerField(null=True, blank=True)
 
+    cloned_relations = ['song', ]
+
     class Meta(BaseModel.Meta):
         abstract = False
+        indexes = [
+            # albums of an artist, in keyset pagination order
+            models.Index(fields=['artist', 'id']),
+        ]
 
 
 class Song(BaseModel):
 
-    album = models.ForeignKey(Album, on_delete=models.CASCADE, null=False, blank=False)
+    # indexed below, together with the position
+    album = models.ForeignKey(Album, on_delete=models.CASCADE, null=False, blank=False, db_index=False)
     position = models.IntegerField(default=0, null=False, blank=False)
 
     class Meta(BaseModel.Meta):
         abstract = False
         ordering = ['position', ]
-
-    def clone(self, request=None):
-
-        if request and not request.user.has_perm('backend.add_song'):
-            raise PermissionDenied
-
-        obj = Song.objects.get(id=self.id)
-        obj.pk = uuid.uuid4()
-        obj.description = increment_revision(self.description)
-        obj.save()
-        return obj
+        indexes = [
+            # songs of an album, and all songs, in keyset pagination order
+            models.Index(fields=['album', 'position', 'id']),
+            models.Index(fields=['position', 'id']),
+        ]
+
+    @classmethod
+    def reorder(cls, album, song_ids, start=1):
+        """
+        Renumber the songs of the album following the order of "song_ids";
+        all positions are changed with a single UPDATE statement.
+
+        Returns the new positions, as a dict {song id: position}.
+        """
+        positions = {song_id: start + i for i, song_id in enumerate(song_ids)}
+        if positions:
+            cls.objects.filter(album=album, pk__in=list(positions.keys())).update(
+                version=models.F('version') + 1,
+                position=models.Case(
+                    *[models.When(pk=song_id, then=models.Value(position)) for song_id, position in positions.items()],
+                    output_field=models.IntegerField()
+                )
+            )
+        return positions
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class FrontendConfig(AppConfig):
     name = 'frontend'
+
+    def ready(self):
+        from .versioning import connect_signals
+        connect_signals()
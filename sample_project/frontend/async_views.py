@@ -0,0 +1,41 @@
+"""
+Asynchronous variants of some views, for deployments served via ASGI
+(see sample_project/asgi.py); requires Django 3.1 or later.
+
+Enabled by settings.FRONTEND_ASYNC_VIEWS, which makes the urls of the
+"frontend" app point here in place of the synchronous views.
+
+Only views which spend most of their time waiting on something other
+than the database benefit from this; the ORM (and the session/auth machinery)
+is synchronous, and Django already runs synchronous views in a thread
+when served via ASGI. For this reason, the edit/delete/clone views
+have no asynchronous variant.
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import render
+from .forms import SimpleForm
+
+
+async def simple_form(request):
+    if request.is_ajax():
+        template_name = 'frontend/includes/simple_form_inner.html'
+    else:
+        template_name = 'frontend/includes/simple_form.html'
+
+    if request.method == 'POST':
+        # The (simulated) slow operation no longer ties up a thread
+        await asyncio.sleep(1.0)
+        form = SimpleForm(data=request.POST)
+        if form.is_valid():
+            form.save()
+            if not request.is_ajax():
+                messages.info(request, "Form has been validated" )
+    else:
+        form = SimpleForm()
+
+    # Rendering may query the database (i.e. for the current user)
+    return await sync_to_async(render)(request, template_name, {
+        'form': form,
+    })
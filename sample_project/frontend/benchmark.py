@@ -0,0 +1,321 @@
+"""
+A small benchmark harness for the frontend views.
+
+Seeds the backend models at a given scale, then measures latency,
+number of queries and peak memory of each registered scenario.
+See "python manage.py benchmark --help".
+"""
+import gc
+import time
+import uuid
+import statistics
+import tracemalloc
+from collections import OrderedDict
+from django.db import connection
+from django.core.cache import cache
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from bootstrap3.forms import render_form
+from frontend.templatetags import frontend_tags
+from frontend.listing import SEARCH_KEY
+from frontend.listing import annotate_search_key
+from frontend.listing import search_queryset
+from frontend.forms import get_model_form_class
+from frontend.formrendering import render_bootstrap_form
+from backend.models import Artist
+from backend.models import Album
+from backend.models import Song
+
+
+SEED_BATCH_SIZE = 5000
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+# Registered scenarios, by name
+scenarios = OrderedDict()
+
+
+def scenario(name):
+    """
+    Register a scenario.
+
+    The decorated function receives the benchmark context and returns a callable
+    which performs a single run of the operation to be measured
+    """
+    def decorator(func):
+        scenarios[name] = func
+        return func
+    return decorator
+
+
+class BenchmarkContext(object):
+
+    def __init__(self, repeat, songs_per_album=10, albums_per_artist=10):
+        self.repeat = repeat
+        self.songs_per_album = songs_per_album
+        self.albums_per_artist = albums_per_artist
+        self.client = None
+
+    def seed(self, n_songs):
+        """
+        Populate the (empty) database with n_songs songs,
+        grouped in albums and artists; rows are inserted in batches
+        """
+        n_albums = max(1, n_songs // self.songs_per_album)
+        n_artists = max(1, n_albums // self.albums_per_artist)
+
+        artists = [Artist(id=uuid.uuid4(), description='Artist %d' % i) for i in range(n_artists)]
+        Artist.objects.bulk_create(artists)
+
+        albums = [
+            Album(id=uuid.uuid4(), description='Album %d' % i, artist=artists[i % n_artists], year=1950 + i % 70)
+            for i in range(n_albums)
+        ]
+        Album.objects.bulk_create(albums)
+
+        for start in range(0, n_songs, SEED_BATCH_SIZE):
+            Song.objects.bulk_create([
+                Song(
+                    id=uuid.uuid4(),
+                    description='Song %d' % i,
+                    album=albums[i // self.songs_per_album % n_albums],
+                    position=i % self.songs_per_album,
+                )
+                for i in range(start, min(start + SEED_BATCH_SIZE, n_songs))
+            ])
+
+        user = get_user_model().objects.create_superuser('benchmark', 'benchmark@localhost', 'benchmark')
+        self.client = Client()
+        self.client.force_login(user)
+
+    def pick_songs(self, n):
+        """
+        Returns an iterator over n song ids, to be consumed
+        by scenarios which need a different object at each run
+        """
+        return iter(list(Song.objects.order_by('?').values_list('id', flat=True)[:n]))
+
+
+def measure(func, repeat):
+    """
+    Run func "repeat" times and collect timings;
+    queries and peak memory are measured in a separate, instrumented run,
+    so that the instrumentation doesn't affect latency
+    """
+    timings = []
+    for i in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000.0)
+
+    gc.collect()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as context:
+        func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return OrderedDict([
+        ('latency_ms', OrderedDict([
+            ('min', round(min(timings), 3)),
+            ('median', round(statistics.median(timings), 3)),
+            ('max', round(max(timings), 3)),
+        ])),
+        ('queries', len(context.captured_queries)),
+        ('peak_memory_kb', round(peak / 1024.0, 1)),
+    ])
+
+
+def explain_queries():
+    """
+    Returns the query plans (as reported by the database) of the main
+    lookups performed by the frontend views, by name
+    """
+    album = Album.objects.order_by('pk').first()
+    querysets = OrderedDict([
+        ('songs_page', Song.objects.order_by('position', 'id')[:101]),
+        ('songs_of_album', Song.objects.filter(album=album).order_by('position', 'id')[:101]),
+        ('albums_of_artist', Album.objects.filter(artist_id=album.artist_id).order_by('id')[:101]),
+        ('search_songs', search_queryset(Song.objects.order_by('position', 'id'), 'Song 12')[:101]),
+        ('autocomplete_albums', search_queryset(
+            annotate_search_key(Album.objects.all()).order_by(SEARCH_KEY, 'id'), 'Album 1')[:21]),
+    ])
+    return OrderedDict([(name, queryset.explain()) for name, queryset in querysets.items()])
+
+
+def _get(client, url, expected_status=200, **extra):
+    response = client.get(url, **extra)
+    assert response.status_code == expected_status, '%s: %d' % (url, response.status_code)
+    return response
+
+
+################################################################################
+# Scenarios
+
+@scenario('songs')
+def songs_listing(context):
+    url = reverse('frontend:songs')
+    return lambda: _get(context.client, url)
+
+
+@scenario('artists_and_albums')
+def artists_and_albums_listing(context):
+    url = reverse('frontend:artists-and-albums')
+    return lambda: _get(context.client, url)
+
+
+@scenario('edit_object_get')
+def edit_object_get(context):
+    song = Song.objects.first()
+    url = reverse('frontend:object-change', args=('backend', 'song', song.id))
+    return lambda: _get(context.client, url, **AJAX)
+
+
+@scenario('edit_object_post')
+def edit_object_post(context):
+    song = Song.objects.first()
+    url = reverse('frontend:object-change', args=('backend', 'song', song.id))
+    data = {
+        'description': song.description,
+        'album': str(song.album_id),
+        'position': song.position,
+    }
+
+    def run():
+        response = context.client.post(url, data, **AJAX)
+        assert response.status_code == 200, response.status_code
+    return run
+
+
+@scenario('delete_object')
+def delete_object(context):
+    ids = context.pick_songs(context.repeat + 1)
+
+    def run():
+        _get(context.client, reverse('frontend:object-delete', args=('backend', 'song', next(ids))))
+    return run
+
+
+@scenario('clone_object')
+def clone_object(context):
+    song = Song.objects.first()
+    url = reverse('frontend:object-clone', args=('backend', 'song', song.id))
+    return lambda: _get(context.client, url)
+
+
+@scenario('export_csv')
+def export_csv(context):
+    url = reverse('frontend:objects-export', args=('backend', 'song'))
+
+    def run():
+        response = _get(context.client, url)
+        for chunk in response.streaming_content:
+            pass
+    return run
+
+
+@scenario('import_csv')
+def import_csv(context):
+    url = reverse('frontend:objects-import', args=('backend', 'song'))
+    album = Album.objects.first()
+    data = 'description,album,position\n' + ''.join(
+        'Imported %d,%s,%d\n' % (i, album.id, i) for i in range(1000)
+    )
+
+    def run():
+        response = context.client.post(url, data, content_type='text/csv')
+        assert response.status_code == 200, response.status_code
+        for chunk in response.streaming_content:
+            pass
+    return run
+
+
+@scenario('edit_field_post')
+def edit_field_post(context):
+    song = Song.objects.first()
+    url = reverse('frontend:object-field', args=('backend', 'song', song.id, 'position'))
+
+    def run():
+        response = context.client.post(url, {'position': song.position}, **AJAX)
+        assert response.status_code == 200, response.status_code
+    return run
+
+
+@scenario('reorder_songs')
+def reorder_songs(context):
+    # not the album used by import_csv
+    album = Album.objects.order_by('-pk').first()
+    url = reverse('frontend:album-reorder-songs', args=(album.id, ))
+    song_ids = [str(song_id) for song_id in album.song_set.values_list('id', flat=True)]
+
+    def run():
+        song_ids.reverse()
+        response = context.client.post(url, {'id': song_ids})
+        assert response.status_code == 200, response.status_code
+    return run
+
+
+@scenario('songs_large_page')
+def songs_large_page(context):
+    # A page of 1000 rows, rendered from scratch (rows cache cleared)
+    url = reverse('frontend:songs') + '?page_size=1000'
+
+    def run():
+        cache.clear()
+        _get(context.client, url)
+    return run
+
+
+@scenario('object_urls')
+def object_urls(context):
+    # The urls of the Edit/Delete/Duplicate links of 1000 rows
+    songs = list(Song.objects.all()[:1000])
+
+    def run():
+        for song in songs:
+            frontend_tags.change_model_url(Song, song.id)
+            frontend_tags.delete_object_url(song)
+            frontend_tags.clone_object_url(song)
+    return run
+
+
+@scenario('object_urls_reverse')
+def object_urls_reverse(context):
+    # Same as "object_urls", calling reverse() for each url (for comparison)
+    songs = list(Song.objects.all()[:1000])
+
+    def run():
+        for song in songs:
+            for view_name in ('frontend:object-change', 'frontend:object-delete', 'frontend:object-clone'):
+                reverse(view_name, args=('backend', 'song', song.id))
+    return run
+
+
+@scenario('song_forms')
+def song_forms(context):
+    # The bootstrap layout of 100 song forms, half of them with errors
+    form_class = get_model_form_class('backend', 'song')
+    song = Song.objects.select_related('album').first()
+    data = {'description': '', 'album': 'missing', 'position': 'first'}
+
+    def run():
+        for i in range(50):
+            render_bootstrap_form(form_class(instance=song))
+            render_bootstrap_form(form_class(data=data, instance=song))
+    return run
+
+
+@scenario('song_forms_bootstrap')
+def song_forms_bootstrap(context):
+    # Same as "song_forms", with bootstrap3's render_form() (for comparison)
+    form_class = get_model_form_class('backend', 'song')
+    song = Song.objects.select_related('album').first()
+    data = {'description': '', 'album': 'missing', 'position': 'first'}
+
+    def run():
+        for i in range(50):
+            render_form(form_class(instance=song))
+            render_form(form_class(data=data, instance=song))
+    return run
@@ -0,0 +1,58 @@
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# Number of rows fetched from the database cursor at a time
+EXPORT_CHUNK_SIZE = getattr(settings, 'FRONTEND_EXPORT_CHUNK_SIZE', 2000)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+
+class Echo(object):
+    """
+    A file-like object which just returns what is written into it;
+    lets csv.writer produce lines for a streaming response
+    """
+    def write(self, value):
+        return value
+
+
+def get_export_fields(model):
+    """
+    Returns the list of fields to be exported: all concrete fields;
+    related objects are represented by their primary key
+    """
+    return list(model._meta.concrete_fields)
+
+
+def export_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Iterate over the queryset as tuples of raw values,
+    without building model instances nor caching the results
+    """
+    queryset = queryset.order_by('pk').values_list(*[field.attname for field in fields])
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def iter_csv(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow([field.name for field in fields])
+    for row in export_rows(queryset, fields, chunk_size):
+        yield writer.writerow(row)
+
+
+def iter_json(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields a json list of objects, one per line
+    """
+    names = [field.name for field in fields]
+    separator = '[\n'
+    for row in export_rows(queryset, fields, chunk_size):
+        yield separator + json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder)
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
@@ -0,0 +1,160 @@
+"""
+A fast path for {% bootstrap_form form %}.
+
+The bootstrap3 layout of a form (form groups, labels, help texts, css classes)
+only depends on the form class and on which fields have errors; we render it
+once per form class and state, with markers in place of the widgets and
+of the error messages, then fill in the markers at each request.
+
+The result is the same markup produced by bootstrap3's render_form();
+forms which bootstrap3 post-processes in ways we can't replicate
+(see is_prerenderable()) are rendered by render_form() as usual.
+"""
+import re
+import uuid
+from django import forms
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.forms.utils import ErrorDict
+from django.utils import translation
+from django.utils.encoding import force_str
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from bootstrap3.forms import render_form
+
+# Widgets whose html is rewritten by bootstrap3 after rendering
+UNSUPPORTED_WIDGETS = (
+    forms.RadioSelect,
+    forms.CheckboxSelectMultiple,
+    forms.SelectDateWidget,
+    forms.MultiWidget,
+)
+
+_MARKER = 'frontend-skeleton-%s-' % uuid.uuid4().hex
+_MARKER_RE = re.compile(re.escape(_MARKER) + r'(\d+)-')
+
+# Prerendered skeletons, keyed by form class and state (see _get_state())
+_skeletons = {}
+
+
+class FormSkeleton(object):
+    """
+    The bootstrap3 markup of a form, split at the markers;
+    "slots" lists, for each marker, either the field name and as_widget() attrs
+    of a widget, or the field name and index of an error message
+    """
+
+    def __init__(self, parts, slots):
+        self.parts = parts
+        self.slots = slots
+
+    def render(self, form):
+        errors = form.errors if form.is_bound else {}
+        html = []
+        for i, part in enumerate(self.parts):
+            if i % 2 == 0:
+                html.append(part)
+                continue
+            kind, name, arg = self.slots[int(part)]
+            if kind == 'widget':
+                # as_widget() may add to the attrs, so we pass a copy
+                html.append(form[name].as_widget(attrs=dict(arg) if arg is not None else None))
+            else:
+                html.append(conditional_escape(force_str(list(errors[name])[arg])))
+        return mark_safe(''.join(html))
+
+
+def is_prerenderable(form):
+    """
+    Only forms which don't customize their fields per instance are supported,
+    and only widgets which bootstrap3 renders as they are
+    """
+    if type(form).__init__ not in (forms.BaseForm.__init__, forms.BaseModelForm.__init__):
+        return False
+    for field in form.fields.values():
+        widget = field.widget
+        if isinstance(widget, UNSUPPORTED_WIDGETS) or field.show_hidden_initial:
+            return False
+        if 'addon_before' in widget.attrs or 'addon_after' in widget.attrs:
+            return False
+    return True
+
+
+def _get_state(form):
+    errors = form.errors if form.is_bound else {}
+    return (
+        type(form),
+        form.prefix,
+        form.auto_id,
+        form.is_bound,
+        form.empty_permitted,
+        translation.get_language(),
+        tuple(sorted((name, len(error_list)) for name, error_list in errors.items())),
+    )
+
+
+def _build_skeleton(form):
+    """
+    Render the form with bootstrap3, while recording the widgets being rendered
+    and replacing them (and the error messages) with markers
+    """
+    slots = []
+
+    def add_slot(*slot):
+        slots.append(slot)
+        return mark_safe('%s%d-' % (_MARKER, len(slots) - 1))
+
+    def recorder(name):
+        def as_widget(widget=None, attrs=None, only_initial=False):
+            if widget is not None or only_initial:
+                raise ValueError('Unsupported widget rendering for field "%s"' % name)
+            return add_slot('widget', name, dict(attrs) if attrs is not None else None)
+        return as_widget
+
+    bound_fields = [form[name] for name in form.fields]
+    real_errors = form._errors
+    try:
+        for bound_field in bound_fields:
+            bound_field.as_widget = recorder(bound_field.name)
+        if form.is_bound and form.errors:
+            form._errors = ErrorDict({
+                name: form.error_class([add_slot('error', name, i) for i in range(len(error_list))])
+                for name, error_list in real_errors.items()
+            })
+        html = render_form(form)
+    finally:
+        form._errors = real_errors
+        for bound_field in bound_fields:
+            del bound_field.as_widget
+
+    # Every marker must come out unchanged, and only once
+    markers = [int(index) for index in _MARKER_RE.findall(html)]
+    if sorted(markers) != list(range(len(slots))):
+        return None
+    return FormSkeleton(_MARKER_RE.split(html), slots)
+
+
+def render_bootstrap_form(form):
+    """
+    Render the form as {% bootstrap_form form %} does (with default options)
+    """
+    if not is_prerenderable(form):
+        return render_form(form)
+    state = _get_state(form)
+    try:
+        skeleton = _skeletons[state]
+    except KeyError:
+        skeleton = _skeletons[state] = _build_skeleton(form)
+    if skeleton is None:
+        return render_form(form)
+    return skeleton.render(form)
+
+
+def invalidate_skeletons():
+    _skeletons.clear()
+
+
+@receiver(setting_changed)
+def _clear_skeletons(setting, **kwargs):
+    if setting in ('BOOTSTRAP3', 'LANGUAGE_CODE'):
+        invalidate_skeletons()
@@ -4,11 +4,92 @@ from django import forms
 from django.apps import apps
 from backend.models import Artist
 from backend.models import Album
+from .widgets import AutocompleteSelect
+from .widgets import AutocompleteModelChoiceField
+
+
+# Registry of ModelForm classes, keyed by (app_label, model_name);
+# filled either explicitly via register_model_form_class(),
+# or lazily by get_model_form_class() on the first request for a given model
+_model_form_classes = {}
+
+# Single field ModelForm classes, keyed by (app_label, model_name, field_name)
+_model_field_form_classes = {}
+
+
+def register_model_form_class(model_form_class, app_label=None, model_name=None):
+    """
+    Explicitly associate a ModelForm class with a Model;
+    app_label and model_name default to those of the form's Meta.model
+    """
+    model = model_form_class._meta.model
+    key = (
+        app_label or model._meta.app_label,
+        model_name or model._meta.model_name,
+    )
+    _model_form_classes[key] = model_form_class
+    return model_form_class
+
+
+def invalidate_model_form_class(app_label=None, model_name=None):
+    """
+    Drop the registered ModelForm for the given Model,
+    or clear the whole registry when called without parameters
+    """
+    if app_label is None and model_name is None:
+        _model_form_classes.clear()
+        _model_field_form_classes.clear()
+    else:
+        _model_form_classes.pop((app_label, model_name), None)
+        for key in list(_model_field_form_classes):
+            if key[:2] == (app_label, model_name):
+                del _model_field_form_classes[key]
 
 
 def get_model_form_class(app_label, model_name):
+    """
+    Returns a suitable ModelForm class for the given Model.
 
-    model_form_class = None
+    The class is resolved and built only once per process;
+    subsequent calls are served from the registry.
+    """
+    key = (app_label, model_name)
+    try:
+        return _model_form_classes[key]
+    except KeyError:
+        pass
+    return register_model_form_class(
+        _find_model_form_class(app_label, model_name),
+        app_label,
+        model_name
+    )
+
+
+def get_model_field_form_class(app_label, model_name, field_name):
+    """
+    Returns a ModelForm class which edits a single field of the given Model;
+    it's derived from get_model_form_class(), so widgets and validation are the same.
+
+    Raises LookupError when the field is not edited by the ModelForm.
+    """
+    key = (app_label, model_name, field_name)
+    try:
+        return _model_field_form_classes[key]
+    except KeyError:
+        pass
+    model_form_class = get_model_form_class(app_label, model_name)
+    if field_name not in model_form_class.base_fields:
+        raise LookupError('Field "%s" is not editable' % field_name)
+    form_class = forms.modelform_factory(
+        model_form_class._meta.model,
+        form=model_form_class,
+        fields=[field_name, ]
+    )
+    _model_field_form_classes[key] = form_class
+    return form_class
+
+
+def _find_model_form_class(app_label, model_name):
 
     # List all ModelForms in this module
     model_forms = [
@@ -23,15 +104,40 @@ def get_model_form_class(app_label, model_name):
         if (model._meta.app_label, model._meta.model_name) == (app_label, model_name):
             return model_form
 
-    # Failing that, build a suitable ModelForm on the fly
+    # Failing that, build a suitable ModelForm on the fly;
+    # ForeignKeys are edited with an autocomplete widget, to avoid loading
+    # the whole related table in a <select>
     model_class = apps.get_model(app_label, model_name)
     class _ObjectForm(forms.ModelForm):
         class Meta:
             model = model_class
             exclude = []
+            widgets = {
+                field.name: AutocompleteSelect
+                for field in model_class._meta.concrete_fields
+                if field.many_to_one
+            }
+            field_classes = {
+                field.name: AutocompleteModelChoiceField
+                for field in model_class._meta.concrete_fields
+                if field.many_to_one
+            }
     return _ObjectForm
 
 
+def get_autocomplete_field_names(model_form_class):
+    """
+    Names of the fields edited with an autocomplete widget; retrieving
+    their related objects along with the edited object (select_related())
+    saves a query per field when rendering the form
+    """
+    return [
+        name
+        for name, field in model_form_class.base_fields.items()
+        if isinstance(field, AutocompleteModelChoiceField)
+    ]
+
+
 class SimpleForm(forms.Form):
 
     value = forms.IntegerField(required=True, label='value', help_text='Enter a value between 1 and 10')
@@ -92,3 +198,9 @@ class AlbumEditForm(forms.ModelForm):
             'artist',
             'year',
         ]
+        widgets = {
+            'artist': AutocompleteSelect,
+        }
+        field_classes = {
+            'artist': AutocompleteModelChoiceField,
+        }
@@ -0,0 +1,159 @@
+import io
+import csv
+import json
+import functools
+import itertools
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import Http404
+from .utils import get_form_errors
+from .versioning import touch_model
+
+
+# Number of rows validated and inserted at a time
+IMPORT_BATCH_SIZE = getattr(settings, 'FRONTEND_IMPORT_BATCH_SIZE', 500)
+
+
+def read_import_rows(request):
+    """
+    Returns the list of rows (dicts) supplied either as an uploaded "file",
+    or as the request body; the format (csv or json) is taken from the "format" parameter,
+    or guessed from the file name or the content type.
+
+    The whole input is parsed here, so that malformed input raises Http404
+    before any response is sent.
+    """
+    upload = request.FILES.get('file')
+    if upload is not None:
+        stream = upload.file
+        guess = upload.name.rsplit('.', 1)[-1].lower()
+    else:
+        stream = io.BytesIO(request.body)
+        guess = 'json' if 'json' in request.content_type else 'csv'
+    format = request.GET.get('format', request.POST.get('format', guess))
+
+    try:
+        if format == 'json':
+            rows = json.loads(stream.read().decode('utf-8-sig'))
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError('a list of objects is expected')
+            return rows
+        if format == 'csv':
+            return list(csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig')))
+    except (ValueError, csv.Error) as e:
+        # UnicodeDecodeError is a ValueError
+        raise Http404('Invalid %s data: %s' % (format, e))
+    raise Http404('Unsupported format "%s"' % format)
+
+
+def _get_prefetched_choices(model_form_class, rows):
+    """
+    Retrieve in a single query per field the related objects referenced by the rows;
+    returns {field name: {key: object}}
+    """
+    prefetched = {}
+    for name, field in model_form_class.base_fields.items():
+        if not isinstance(field, forms.ModelChoiceField) or isinstance(field, forms.ModelMultipleChoiceField):
+            continue
+        model = field.queryset.model
+        key_field = model._meta.get_field(field.to_field_name) if field.to_field_name else model._meta.pk
+        keys = set()
+        for row in rows:
+            value = row.get(name)
+            if value not in field.empty_values:
+                try:
+                    keys.add(key_field.to_python(value))
+                except ValidationError:
+                    pass
+        objects = field.queryset.filter(**{key_field.name + '__in': keys}) if keys else []
+        prefetched[name] = {str(getattr(obj, key_field.attname)): obj for obj in objects}
+    return prefetched
+
+
+def _prefetched_to_python(field, objects, value):
+    """
+    Replacement for ModelChoiceField.to_python() which looks up
+    the prefetched objects instead of querying the database
+    """
+    if value in field.empty_values:
+        return None
+    model = field.queryset.model
+    key_field = model._meta.get_field(field.to_field_name) if field.to_field_name else model._meta.pk
+    try:
+        return objects[str(key_field.to_python(value))]
+    except (ValidationError, KeyError):
+        raise ValidationError(field.error_messages['invalid_choice'], code='invalid_choice')
+
+
+def _get_import_form_class(model_form_class):
+    """
+    Derive from the ModelForm a form which resolves related objects
+    from those prefetched for the current batch of rows
+    """
+
+    class ImportForm(model_form_class):
+
+        def __init__(self, *args, prefetched=None, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prefetched = prefetched or {}
+            for name, choices in self.prefetched.items():
+                field = self.fields[name]
+                field.to_python = functools.partial(_prefetched_to_python, field, choices)
+
+        def _get_validation_exclusions(self):
+            # The related objects are known to exist, so skip the model-level
+            # ForeignKey validation (which would run a query for each of them)
+            return list(super()._get_validation_exclusions()) + list(self.prefetched)
+
+    return ImportForm
+
+
+def import_objects(model_form_class, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate each row with the given ModelForm, and insert the valid ones
+    with a bulk_create() every "batch_size" rows; all insertions happen
+    in a single transaction, which is committed before returning.
+
+    Returns a list with a dict for each invalid row ({'row': row number, 'errors': {...}}),
+    followed by the totals ({'created': n, 'failed': n}).
+    """
+    model = model_form_class._meta.model
+    form_class = _get_import_form_class(model_form_class)
+    rows = iter(rows)
+    results = []
+    created = failed = 0
+    row_number = 0
+    with transaction.atomic():
+        while True:
+            chunk = list(itertools.islice(rows, batch_size))
+            if not chunk:
+                break
+            prefetched = _get_prefetched_choices(model_form_class, chunk)
+            objects = []
+            for data in chunk:
+                row_number += 1
+                form = form_class(data=data, prefetched=prefetched)
+                if form.is_valid():
+                    objects.append(form.save(commit=False))
+                else:
+                    failed += 1
+                    results.append({'row': row_number, 'errors': get_form_errors(form)})
+            model.objects.bulk_create(objects)
+            created += len(objects)
+
+    # bulk_create() sends no signals
+    if created:
+        touch_model(model)
+    results.append({'created': created, 'failed': failed})
+    return results
+
+
+def iter_ndjson(items):
+    """
+    Serialize a sequence of dicts as newline delimited json
+    """
+    for item in items:
+        yield json.dumps(item, cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,172 @@
+"""
+Per-request instrumentation: SQL queries, template rendering
+and frontend_tags filters.
+
+Activated by InstrumentationMiddleware (see middleware.py);
+when no request is being instrumented, the wrappers installed here
+just call the original functions.
+"""
+import time
+import functools
+import threading
+from collections import OrderedDict
+from django.template.base import Template
+
+
+_local = threading.local()
+_lock = threading.Lock()
+_installed = False
+
+# Totals by view, accumulated since process start (or last reset)
+view_stats = {}
+
+
+class RequestStats(object):
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.templates = OrderedDict()
+        self.tags_time = 0.0
+        self.tags = OrderedDict()
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.start
+
+    def add(self, registry, name, elapsed):
+        count, total = registry.get(name, (0, 0.0))
+        registry[name] = (count + 1, total + elapsed)
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def start_request():
+    _local.stats = RequestStats()
+    return _local.stats
+
+
+def end_request():
+    stats = current_stats()
+    _local.stats = None
+    return stats
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """
+    To be installed with connection.execute_wrapper()
+    """
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = current_stats()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_time += time.perf_counter() - start
+
+
+def _instrument_template_render(render):
+
+    @functools.wraps(render)
+    def wrapper(self, context):
+        stats = current_stats()
+        if stats is None:
+            return render(self, context)
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.template_depth -= 1
+            # Nested templates (includes, parents) are accounted for in the outermost one
+            if stats.template_depth == 0:
+                stats.template_time += elapsed
+            stats.add(stats.templates, self.name or '<unknown>', elapsed)
+    return wrapper
+
+
+def _instrument_tag_function(func, name):
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = current_stats()
+        if stats is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.tags_time += elapsed
+            stats.add(stats.tags, name, elapsed)
+    return wrapper
+
+
+def install():
+    """
+    Wrap Template._render, the frontend_tags filters and the permission checks;
+    must be called before any template is compiled
+    """
+    global _installed
+    if _installed:
+        return
+    from .templatetags import frontend_tags
+
+    Template._render = _instrument_template_render(Template._render)
+    for name, func in list(frontend_tags.register.filters.items()):
+        frontend_tags.register.filters[name] = _instrument_tag_function(func, name)
+    frontend_tags.has_model_perm = _instrument_tag_function(frontend_tags.has_model_perm, 'has_model_perm')
+    _installed = True
+
+
+def record(view_name, stats):
+    """
+    Accumulate request stats into the per-view totals
+    """
+    with _lock:
+        totals = view_stats.setdefault(view_name, {
+            'requests': 0,
+            'total_ms': 0.0,
+            'sql_count': 0,
+            'sql_ms': 0.0,
+            'templates_ms': 0.0,
+            'tags_ms': 0.0,
+            'templates': {},
+            'tags': {},
+        })
+        totals['requests'] += 1
+        totals['total_ms'] += stats.total_time * 1000.0
+        totals['sql_count'] += stats.sql_count
+        totals['sql_ms'] += stats.sql_time * 1000.0
+        totals['templates_ms'] += stats.template_time * 1000.0
+        totals['tags_ms'] += stats.tags_time * 1000.0
+        for registry, target in ((stats.templates, totals['templates']), (stats.tags, totals['tags'])):
+            for name, (count, elapsed) in registry.items():
+                item = target.setdefault(name, {'count': 0, 'ms': 0.0})
+                item['count'] += count
+                item['ms'] += elapsed * 1000.0
+
+
+def reset():
+    with _lock:
+        view_stats.clear()
+
+
+def server_timing(stats):
+    """
+    Format request stats as a "Server-Timing" header value
+    """
+    metrics = [
+        'sql;dur=%.2f;desc="%d queries"' % (stats.sql_time * 1000.0, stats.sql_count),
+        'tpl;dur=%.2f;desc="templates"' % (stats.template_time * 1000.0),
+        'tags;dur=%.2f;desc="frontend_tags"' % (stats.tags_time * 1000.0),
+        'total;dur=%.2f' % (stats.total_time * 1000.0),
+    ]
+    return ', '.join(metrics)
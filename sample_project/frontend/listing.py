@@ -0,0 +1,259 @@
+import base64
+import copy
+import json
+import uuid
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import CharField
+from django.db.models import Func
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import render
+
+
+# Template used in place of "base.html" when only the table rows are required
+ROWS_BASE_TEMPLATE = 'frontend/includes/objects_table_rows.html'
+
+DEFAULT_PAGE_SIZE = getattr(settings, 'FRONTEND_LISTING_PAGE_SIZE', 100)
+MAX_PAGE_SIZE = getattr(settings, 'FRONTEND_LISTING_MAX_PAGE_SIZE', 1000)
+
+
+class KeysetPage(object):
+    """
+    A page of objects retrieved with keyset (seek) pagination
+    """
+
+    def __init__(self, object_list, next_cursor, next_url=''):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.next_url = next_url
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+# Name of the annotation added by annotate_search_key()
+SEARCH_KEY = 'search_key'
+
+
+class SearchKey(Func):
+    """
+    A text field as compared by the case-insensitive search indexes
+    (see the backend migrations); filtering and sorting on it lets
+    the database read prefix matches from the index, already in order
+    """
+    template = 'UPPER(%(expressions)s)'
+    output_field = CharField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='%(expressions)s COLLATE NOCASE', **extra_context)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='(UPPER(%(expressions)s) COLLATE "C")', **extra_context)
+
+    @staticmethod
+    def prepare_term(term, vendor):
+        # SQLite compares with the NOCASE collation, other databases uppercase the field
+        return term if vendor == 'sqlite' else term.upper()
+
+
+def annotate_search_key(queryset, field_name='description'):
+    """
+    Annotate the queryset with the SearchKey of the given field, as "search_key";
+    use order_by(SEARCH_KEY) to sort the results as the search index does
+    """
+    if SEARCH_KEY not in queryset.query.annotations:
+        queryset = queryset.annotate(**{SEARCH_KEY: SearchKey(field_name)})
+    return queryset
+
+
+def search_queryset(queryset, term, field_name='description'):
+    """
+    Filter the queryset on a case-insensitive prefix of the given field;
+    prefix matching (unlike "contains") can be served by an index on the field's SearchKey.
+
+    When the term is a UUID, and the primary key is a UUIDField,
+    the object is looked up by primary key instead.
+    """
+    term = term.strip()
+    if term and queryset.model._meta.pk.get_internal_type() == 'UUIDField':
+        try:
+            return queryset.filter(pk=uuid.UUID(term))
+        except ValueError:
+            pass
+    if term:
+        vendor = connections[queryset.db].vendor
+        queryset = annotate_search_key(queryset, field_name).filter(**{
+            SEARCH_KEY + '__startswith': SearchKey.prepare_term(term, vendor)
+        })
+    return queryset
+
+
+def search_request(request, queryset, param='q'):
+    """
+    Apply the search term supplied as "q" request parameter, if any
+    """
+    return search_queryset(queryset, request.GET.get(param, ''))
+
+
+def plan_queryset(queryset, columns, restrict_fields=False):
+    """
+    Adjust the queryset to the columns displayed in a table,
+    to avoid running one more query per row.
+
+    "columns" lists field names or paths ("album", "album__artist", "position", ...);
+    every ForeignKey (or OneToOne) found along a path is followed with select_related().
+    When "restrict_fields" is True, only the listed fields of the main model
+    (plus primary key and ordering columns) are loaded.
+    """
+    model = queryset.model
+    related = []
+    fields = []
+    for column in columns:
+        names = column.split('__')
+        opts = model._meta
+        for i, name in enumerate(names):
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            if i == 0:
+                fields.append(field.name)
+            if not (field.many_to_one or field.one_to_one):
+                break
+            related.append('__'.join(names[:i + 1]))
+            opts = field.related_model._meta
+
+    if related:
+        queryset = queryset.select_related(*sorted(set(related)))
+    if restrict_fields:
+        ordering = [field.name for field, descending in get_keyset_ordering(queryset)]
+        queryset = queryset.only(*sorted(set(fields + ordering)))
+    return queryset
+
+
+def get_keyset_ordering(queryset):
+    """
+    Returns the list of (field, descending) pairs used to sort the queryset;
+    the primary key is always appended to make the ordering total.
+
+    Only plain model fields and annotations are supported (no lookups spanning relations).
+    """
+    model = queryset.model
+    ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+    annotations = queryset.query.annotations
+
+    keys = []
+    for item in ordering:
+        if not isinstance(item, str) or '__' in item or item.lstrip('-') == '?':
+            raise ValueError('Unsupported ordering for keyset pagination: "%s"' % item)
+        descending = item.startswith('-')
+        name = item.lstrip('-')
+        if name in annotations:
+            # a field named after the annotation, to convert and filter its values
+            field = copy.copy(annotations[name].output_field)
+            field.set_attributes_from_name(name)
+        else:
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        keys.append((field, descending))
+
+    if model._meta.pk not in [field for field, descending in keys]:
+        keys.append((model._meta.pk, False))
+    return keys
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=DjangoJSONEncoder).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def decode_cursor(cursor, keys):
+    """
+    Rebuilds the list of field values from an opaque cursor;
+    raises Http404 on malformed input
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        if len(values) != len(keys):
+            raise ValueError('cursor does not match ordering')
+        return [field.to_python(value) for (field, descending), value in zip(keys, values)]
+    except Exception as e:
+        raise Http404('Invalid cursor: %s' % e)
+
+
+def keyset_paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Returns the page of objects which follows the given cursor.
+
+    Instead of OFFSET, we filter on the values of the ordering columns
+    of the last row received, so that deep pages cost the same as the first one.
+    """
+    keys = get_keyset_ordering(queryset)
+    queryset = queryset.order_by(*[
+        ('-' if descending else '') + field.attname
+        for field, descending in keys
+    ])
+
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        seek = Q()
+        for i, (field, descending) in enumerate(keys):
+            condition = Q(**{
+                field.attname + ('__lt' if descending else '__gt'): values[i]
+            })
+            for j in range(i):
+                condition &= Q(**{keys[j][0].attname: values[j]})
+            seek |= condition
+        # Redundant bound on the first column, which lets the database
+        # start the index range scan right at the cursor
+        first_field, first_descending = keys[0]
+        bound = Q(**{first_field.attname + ('__lte' if first_descending else '__gte'): values[0]})
+        queryset = queryset.filter(bound & seek)
+
+    object_list = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(object_list) > page_size:
+        object_list = object_list[:page_size]
+        last = object_list[-1]
+        next_cursor = encode_cursor([getattr(last, field.attname) for field, descending in keys])
+    return KeysetPage(object_list, next_cursor)
+
+
+def get_page_size(request):
+    try:
+        page_size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def paginate_request(request, queryset, cursor_param='cursor'):
+    """
+    Paginate the queryset according to the "cursor" and "page_size" request parameters;
+    the returned page is annotated with the url of the next page, if any
+    """
+    page = keyset_paginate(
+        queryset,
+        cursor=request.GET.get(cursor_param),
+        page_size=get_page_size(request),
+    )
+    if page.has_next:
+        params = request.GET.copy()
+        params[cursor_param] = page.next_cursor
+        page.next_url = '?' + params.urlencode()
+    return page
+
+
+def render_listing(request, template_name, context):
+    """
+    Render a listing page based on "frontend/objects_table.html";
+    for ajax requests, only the table rows are returned
+    """
+    if request.is_ajax():
+        context['base_template'] = ROWS_BASE_TEMPLATE
+    return render(request, template_name, context)
@@ -0,0 +1,142 @@
+import os
+import json
+import tempfile
+import platform
+import datetime
+from collections import OrderedDict
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from frontend import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, queries and peak memory of the frontend views on a freshly seeded test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--songs', type=int, nargs='+', default=[1000, ],
+            help='Number of songs to be seeded; one run for each value (default: 1000)')
+        parser.add_argument('--repeat', type=int, default=10,
+            help='Number of timed runs for each scenario (default: 10)')
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=list(benchmark.scenarios.keys()),
+            help='Scenario to be run (default: all); can be repeated')
+        parser.add_argument('--db-dir', default=tempfile.gettempdir(),
+            help='Folder for the SQLite test database (default: system temp folder)')
+        parser.add_argument('--output', '-o',
+            help='Save results to the given json file')
+        parser.add_argument('--compare',
+            help='Compare results with those saved in the given json file')
+        parser.add_argument('--explain', action='store_true',
+            help='Report the query plans of the main lookups')
+        parser.add_argument('--migrate-to', nargs=2, metavar=('APP_LABEL', 'MIGRATION_NAME'),
+            help='Migrate the test database back to the given migration before seeding, '
+                 'i.e. to measure the schema before a change')
+
+    def handle(self, *args, **options):
+
+        names = options['scenarios'] or list(benchmark.scenarios.keys())
+        results = []
+        plans = []
+        for n_songs in options['songs']:
+            run_results, run_plans = self.run(
+                n_songs, names, options['repeat'], options['db_dir'],
+                options['explain'], options['migrate_to']
+            )
+            results += run_results
+            plans += run_plans
+
+        data = OrderedDict([
+            ('meta', OrderedDict([
+                ('timestamp', datetime.datetime.now().isoformat()),
+                ('python', platform.python_version()),
+                ('django', django.get_version()),
+                ('database', connection.vendor),
+                ('repeat', options['repeat']),
+                ('migrate_to', options['migrate_to']),
+            ])),
+            ('results', results),
+            ('plans', plans),
+        ])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(data, f, indent=4)
+            self.stdout.write('Results saved to "%s"' % options['output'])
+
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    previous = json.load(f)
+            except (IOError, ValueError) as e:
+                raise CommandError(str(e))
+            self.compare(previous['results'], results)
+            if plans:
+                self.compare_plans(previous.get('plans', []), plans)
+
+    def run(self, n_songs, names, repeat, db_dir, explain=False, migrate_to=None):
+        """
+        Seed a new test database with n_songs songs, then run the scenarios;
+        returns the results and the query plans (if required)
+        """
+        results = []
+        plans = []
+        if connection.vendor == 'sqlite':
+            # Use a file, as an in-memory database would survive destroy_test_db()
+            connection.settings_dict['TEST']['NAME'] = os.path.join(db_dir, 'benchmark_%d.sqlite3' % os.getpid())
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            if migrate_to:
+                call_command('migrate', *migrate_to, verbosity=0)
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                context = benchmark.BenchmarkContext(repeat)
+                self.stderr.write('Seeding %d songs ...' % n_songs)
+                context.seed(n_songs)
+                if explain:
+                    for query, plan in benchmark.explain_queries().items():
+                        plans.append(OrderedDict([('songs', n_songs), ('query', query), ('plan', plan)]))
+                        self.stdout.write('%8d songs %s:\n%s\n' % (n_songs, query, self.indent(plan)))
+                for name in names:
+                    self.stderr.write('Running "%s" ...' % name)
+                    result = OrderedDict([('songs', n_songs), ('scenario', name)])
+                    result.update(benchmark.measure(benchmark.scenarios[name](context), repeat))
+                    results.append(result)
+                    self.stdout.write('%8d songs %-24s %10.2f ms %6d queries %10.1f KB' % (
+                        n_songs, name,
+                        result['latency_ms']['median'],
+                        result['queries'],
+                        result['peak_memory_kb'],
+                    ))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        return results, plans
+
+    def indent(self, text):
+        return '\n'.join('        ' + line for line in text.splitlines())
+
+    def compare(self, previous, results):
+        previous = {(r['songs'], r['scenario']): r for r in previous}
+        self.stdout.write('\nComparison (current / previous):')
+        for result in results:
+            other = previous.get((result['songs'], result['scenario']))
+            if other is None:
+                continue
+            self.stdout.write('%8d songs %-24s latency x%.2f, queries %d -> %d, memory x%.2f' % (
+                result['songs'], result['scenario'],
+                result['latency_ms']['median'] / max(other['latency_ms']['median'], 0.001),
+                other['queries'], result['queries'],
+                result['peak_memory_kb'] / max(other['peak_memory_kb'], 0.001),
+            ))
+
+    def compare_plans(self, previous, plans):
+        previous = {(p['songs'], p['query']): p for p in previous}
+        self.stdout.write('\nQuery plans (previous -> current):')
+        for plan in plans:
+            other = previous.get((plan['songs'], plan['query']))
+            if other is None:
+                continue
+            self.stdout.write('%8d songs %s:\n%s\n    ->\n%s\n' % (
+                plan['songs'], plan['query'], self.indent(other['plan']), self.indent(plan['plan'])
+            ))
@@ -0,0 +1,40 @@
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from . import instrumentation
+
+
+INSTRUMENTATION_ENABLED = getattr(settings, 'FRONTEND_INSTRUMENTATION', False)
+
+
+class InstrumentationMiddleware(object):
+    """
+    Measure SQL, template rendering and frontend_tags time for each request;
+    results are sent back in a "Server-Timing" header and accumulated by view
+    (see the "instrumentation-stats" view).
+
+    Enabled by settings.FRONTEND_INSTRUMENTATION; should be listed first in MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        if not INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        stats = instrumentation.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(instrumentation.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            instrumentation.end_request()
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name = resolver_match.view_name if resolver_match else '<unresolved>'
+        instrumentation.record(view_name, stats)
+        response['Server-Timing'] = instrumentation.server_timing(stats)
+        return response
@@ -1,5 +1,6 @@
 'use strict';
 
 $(document).ready(function() {
+    initAutocompleteWidgets(document);
+    initInlineEditing(document);
 });
-
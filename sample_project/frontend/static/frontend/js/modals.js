@@ -75,6 +75,7 @@ function formAjaxSubmit(modal, action, cbAfterLoad, cbAfterSuccess) {
             modal.find('.modal-body form').submit();
         });
     }
+    initAutocompleteWidgets(modal);
     if (cbAfterLoad) { cbAfterLoad(modal); }
 
     // Give focus to first visible form field
@@ -95,8 +96,24 @@ function formAjaxSubmit(modal, action, cbAfterLoad, cbAfterSuccess) {
             type: $(this).attr('method'),
             url: url,
             data: $(this).serialize(),
+            // Views which support it will answer with a compact json result
+            // ({ok, object_id, errors}) instead of the rendered form
+            headers: {'Accept': 'application/json, text/html;q=0.9, */*;q=0.8'},
             success: function(xhr, ajaxOptions, thrownError) {
 
+                if ($.isPlainObject(xhr)) {
+                    if (xhr.ok) {
+                        modal.find('input[name=object_id]').val(xhr.object_id);
+                        modal.data('row', xhr.row || null);
+                        $(modal).modal('hide');
+                        if (cbAfterSuccess) { cbAfterSuccess(modal); }
+                    } else {
+                        // keep the form open, and just display the errors
+                        displayFormErrors(form, xhr.errors);
+                    }
+                    return;
+                }
+
                 // update the modal body with the new form
                 $(modal).find('.modal-body').html(xhr);
 
@@ -109,12 +126,27 @@ function formAjaxSubmit(modal, action, cbAfterLoad, cbAfterSuccess) {
                 if ($(xhr).find('.has-error').length > 0) {
                     formAjaxSubmit(modal, url, cbAfterLoad, cbAfterSuccess);
                 } else {
-                    // otherwise, we've done and can close the modal
+                    // otherwise, we've done and can close the modal;
+                    // keep the row data supplied by the server (if any) for the callback
+                    var row_data = $(modal).find('#object-row');
+                    modal.data('row', row_data.length ? JSON.parse(row_data.text()) : null);
                     $(modal).modal('hide');
                     if (cbAfterSuccess) { cbAfterSuccess(modal); }
                 }
             },
             error: function(xhr, ajaxOptions, thrownError) {
+                if (xhr.status == 409) {
+                    // Conflict: the object has been changed by someone else meanwhile;
+                    // the form will now carry the current version, so it can be sent again
+                    if (xhr.responseJSON) {
+                        form.find('input[name=version]').val(xhr.responseJSON.version);
+                        displayFormErrors(form, xhr.responseJSON.errors);
+                    } else {
+                        $(modal).find('.modal-body').html(xhr.responseText);
+                        formAjaxSubmit(modal, url, cbAfterLoad, cbAfterSuccess);
+                    }
+                    return;
+                }
                 console.log('SERVER ERROR: ' + thrownError);
             },
             complete: function() {
@@ -125,6 +157,80 @@ function formAjaxSubmit(modal, action, cbAfterLoad, cbAfterSuccess) {
 }
 
 
+/**
+ * Activate the AutocompleteSelect widgets found in container.
+ *
+ * The visible text input queries the url in its "data-autocomplete-url" attribute,
+ * while the selected object id is kept in the hidden input which precedes it.
+ */
+
+function initAutocompleteWidgets(container) {
+    $(container).find('input[data-autocomplete-url]').each(function() {
+        var input = $(this);
+        var hidden = input.prev('input[type=hidden]');
+        input.autocomplete({
+            minLength: 0,
+            source: function(request, response) {
+                $.getJSON(input.data('autocomplete-url'), {q: request.term}, function(data) {
+                    var items = $.map(data.results, function(item) {
+                        return {label: item.text, value: item.text, id: item.id};
+                    });
+                    if (data.next) {
+                        items.push({label: '...', value: '', id: null, disabled: true});
+                    }
+                    response(items);
+                });
+            },
+            select: function(event, ui) {
+                if (ui.item.disabled) {
+                    return false;
+                }
+                hidden.val(ui.item.id);
+            },
+            change: function(event, ui) {
+                if (!ui.item && !input.val()) {
+                    hidden.val('');
+                }
+            }
+        }).on('focus', function() {
+            input.autocomplete('search', input.val());
+        });
+    });
+}
+
+
+/**
+ * Display the errors received from the server in an existing form.
+ *
+ * @param {object}  form    The form (jQuery object).
+ * @param {object}  errors  Messages by field name ("__all__" for non-field errors).
+ *
+ * @return {none}
+ */
+
+function displayFormErrors(form, errors) {
+    form.find('.form-errors').remove();
+    form.find('.form-group.has-error').removeClass('has-error');
+    $.each(errors, function(name, messages) {
+        var text = messages.join(' ');
+        var field = form.find('[name="' + name + '"]');
+        if (name == '__all__' || field.length <= 0) {
+            form.prepend($('<div class="alert alert-danger form-errors"></div>').text(text));
+        } else {
+            field.closest('.form-group')
+                .addClass('has-error')
+                .append($('<div class="help-block form-errors"></div>').text(text));
+        }
+    });
+    form.find('.has-error :input:visible').first().focus();
+}
+
+
+// Forms received by openModalDialogWithForm() which the server marked with an ETag,
+// keyed by url; they are revalidated with "If-None-Match" before each reuse
+var modalFormCache = {};
+
+
 function openModalDialogWithForm(event, modal, cbAfterLoad, cbAfterSuccess) {
     // If "modal" is a selector, initialize a modal object,
     // otherwise just use it
@@ -138,10 +244,23 @@ function openModalDialogWithForm(event, modal, cbAfterLoad, cbAfterSuccess) {
         return;
     }
 
+    var cached = modalFormCache[url];
     $.ajax({
         type: 'GET',
-        url: url
+        url: url,
+        headers: cached ? {'If-None-Match': cached.etag} : {}
     }).done(function(data, textStatus, jqXHR) {
+        if (jqXHR.status == 304 && cached) {
+            // Not modified: reuse the form received previously
+            data = cached.html;
+        } else {
+            var etag = jqXHR.getResponseHeader('ETag');
+            if (etag) {
+                modalFormCache[url] = {etag: etag, html: data};
+            } else {
+                delete modalFormCache[url];
+            }
+        }
         modal.find('.modal-body').html(data);
         modal.modal('show');
         formAjaxSubmit(modal, url, cbAfterLoad, cbAfterSuccess);
@@ -184,8 +303,362 @@ function confirmRemoteAction(url, title, afterDoneCallback) {
 }
 
 
+/**
+ * Invoke remote bulk action upon user confirmation.
+ *
+ * As confirmRemoteAction(), but POSTs the given object ids as "id" parameters.
+ *
+ * @param {string}              url         Server action to be invoked.
+ * @param {Array}               object_ids  Ids of the objects to be processed.
+ * @param {string}              title       Title for confirmation modal dialog.
+ * @param {afterDoneCallback}   [function]  Callback to be invoked after successfull execution.
+ *
+ * @return {none}
+ */
+
+function confirmRemoteBulkAction(url, object_ids, title, afterDoneCallback) {
+    if (object_ids.length <= 0) {
+        return;
+    }
+    var modal = $('#modal_confirm');
+    modal.find('.modal-body p').text(title);
+    modal.find('.btn-yes').off().on('click', function() {
+        // User selected "Yes", so proceed with remote call
+        $.ajax({
+            type: 'POST',
+            url: url,
+            data: {id: object_ids},
+            traditional: true,
+            headers: {'X-CSRFToken': getCookie('csrftoken')}
+        }).done(function(data) {
+            if (afterDoneCallback) {
+                afterDoneCallback(data);
+            }
+        }).fail(function(jqXHR, textStatus, errorThrown) {
+            display_server_error(errorThrown);
+        });
+    });
+    modal.modal('show');
+}
+
+
+/**
+ * Collect the ids of the rows selected in a table.
+ *
+ * Rows are expected to provide a checkbox with class "select-row"
+ * and the object id as value.
+ */
+
+function getSelectedObjectIds(table) {
+    return $(table).find('input.select-row:checked').map(function() {
+        return $(this).val();
+    }).get();
+}
+
+
+function getCookie(name) {
+    var value = null;
+    $.each(document.cookie.split(';'), function(index, cookie) {
+        cookie = $.trim(cookie);
+        if (cookie.substring(0, name.length + 1) == (name + '=')) {
+            value = decodeURIComponent(cookie.substring(name.length + 1));
+            return false;
+        }
+    });
+    return value;
+}
+
+
 function display_server_error(errorThrown) {
     alert('SERVER ERROR: ' + errorThrown);
 }
 
 
+/**
+ * Load the next page of a table.
+ *
+ * Replace the "load-more" table row which triggered the event
+ * with the rows fragment received from the server;
+ * the fragment, in turn, ends with a new "load-more" row when more rows are available.
+ *
+ * Sample call:
+ *
+ *     <tr class="load-more">
+ *         <td><a href="?cursor=..." onclick="loadMoreRows(event); return false;">More</a></td>
+ *     </tr>
+ */
+
+function loadMoreRows(event) {
+    var row = $(event.target).closest('tr');
+    var url = $(event.target).closest('a').attr('href');
+    $.ajax({
+        type: 'GET',
+        url: url
+    }).done(function(data) {
+        row.replaceWith(data);
+    }).fail(function(jqXHR, textStatus, errorThrown) {
+        display_server_error(errorThrown);
+    });
+}
+
+
+/**
+ * Table rows helpers.
+ *
+ * Rows are expected to carry the object id in a "data-object-id" attribute,
+ * and cells to be refreshed the field name in a "data-field" attribute:
+ *
+ *     <tr data-object-id="{{ object.id }}">
+ *         <td data-field="description">{{ object.description }}</td>
+ *     </tr>
+ */
+
+function findObjectRow(table, object_id) {
+    return $(table).find('tr[data-object-id="' + object_id + '"]');
+}
+
+
+/**
+ * Update the cells of an existing row with the data received from the server
+ * (see get_object_row_data()); returns the row, if found.
+ */
+
+function updateObjectRow(table, row_data) {
+    var row = findObjectRow(table, row_data.id);
+    $.each(row_data.fields, function(name, value) {
+        row.find('[data-field="' + name + '"]').text(value);
+    });
+    return row;
+}
+
+
+function removeObjectRow(table, object_id) {
+    findObjectRow(table, object_id).remove();
+}
+
+
+/**
+ * Retrieve the rendered rows for the given objects from a listing page,
+ * then pass them to the supplied callback.
+ *
+ * @param {string}      url         The listing page (which renders only rows for ajax requests).
+ * @param {Array}       object_ids  Ids of the objects to be rendered.
+ * @param {function}    callback    Receives the rows as a jQuery object.
+ */
+
+function loadObjectRows(url, object_ids, callback) {
+    $.ajax({
+        type: 'GET',
+        url: url,
+        data: {pk: object_ids, page_size: object_ids.length},
+        traditional: true
+    }).done(function(data) {
+        callback($($.parseHTML($.trim(data))).filter('tr[data-object-id]'));
+    }).fail(function(jqXHR, textStatus, errorThrown) {
+        display_server_error(errorThrown);
+    });
+}
+
+
+/**
+ * Upload a csv or json file to a bulk import endpoint.
+ *
+ * The server answers with newline delimited json: one line for each invalid row
+ * ({row: ..., errors: ...}), then the totals ({created: ..., failed: ...});
+ * the callback receives the parsed lines.
+ *
+ * Sample call:
+ *
+ *     <input type="file" onchange="importObjects('/object/backend/song/import/', this, afterObjectsImport);">
+ */
+
+function importObjects(url, input, afterDoneCallback) {
+    if (input.files.length <= 0) {
+        return;
+    }
+    var data = new FormData();
+    data.append('file', input.files[0]);
+    $.ajax({
+        type: 'POST',
+        url: url,
+        data: data,
+        processData: false,
+        contentType: false,
+        dataType: 'text',
+        headers: {'X-CSRFToken': getCookie('csrftoken')}
+    }).done(function(data) {
+        var results = $.map($.trim(data).split('\n'), function(line) {
+            return JSON.parse(line);
+        });
+        if (afterDoneCallback) {
+            afterDoneCallback(results);
+        }
+    }).fail(function(jqXHR, textStatus, errorThrown) {
+        display_server_error(errorThrown);
+    }).always(function() {
+        // allow uploading the same file again
+        $(input).val('');
+    });
+}
+
+
+/**
+ * Inline editing of table cells.
+ *
+ * Double clicking a cell which provides a "data-edit-url" attribute
+ * (see the "change_field_url" template filter) replaces its content with an input box;
+ * "Enter" sends the new value, "Esc" cancels.
+ * On success, the whole row is refreshed with the row data returned by the server.
+ *
+ * Sample usage:
+ *
+ *     <tr data-object-id="{{object.id}}">
+ *         <td data-field="position" data-edit-url="{{object|change_field_url:'position'}}">{{object.position}}</td>
+ *     </tr>
+ *
+ *     initInlineEditing(document);
+ */
+
+function initInlineEditing(container) {
+    $(container).on('dblclick', '[data-edit-url]', function(event) {
+        var cell = $(this);
+        if (cell.find('input.inline-edit').length > 0) {
+            return;
+        }
+        var text = cell.text().trim();
+        var input = $('<input type="text" class="form-control input-sm inline-edit">').val(text);
+        cell.data('original-text', text).empty().append(input);
+        input.focus().select();
+
+        input.on('keydown', function(event) {
+            if (event.key == 'Escape') {
+                cell.removeClass('has-error').text(cell.data('original-text'));
+            } else if (event.key == 'Enter') {
+                event.preventDefault();
+                saveInlineEdit(cell, input.val());
+            }
+        });
+    });
+}
+
+
+function saveInlineEdit(cell, value) {
+    var data = {};
+    data[cell.data('field')] = value;
+    $.ajax({
+        type: 'PATCH',
+        url: cell.data('edit-url'),
+        data: JSON.stringify(data),
+        contentType: 'application/json',
+        dataType: 'json',
+        headers: {'X-CSRFToken': getCookie('csrftoken')}
+    }).done(function(data) {
+        if (data.ok) {
+            cell.removeClass('has-error').removeAttr('title').text(value);
+            updateObjectRow(cell.closest('table'), data.row);
+        } else {
+            var messages = [];
+            $.each(data.errors, function(name, errors) {
+                messages = messages.concat(errors);
+            });
+            cell.addClass('has-error').attr('title', messages.join(' '));
+        }
+    }).fail(function(jqXHR, textStatus, errorThrown) {
+        display_server_error(errorThrown);
+    });
+}
+
+
+/**
+ * Toggle the drag-and-drop sorting of the rows of a table (requires jquery-ui).
+ *
+ * Whenever a row is dropped, the ids of all rows, in the new order,
+ * are posted to the given url as "id" parameters, and the server answer
+ * is passed to the callback; returns true when sorting has been enabled.
+ *
+ * Sample call:
+ *
+ *     toggleSortableRows('.objects-table', '/album/.../reorder-songs/', afterSongsReorder);
+ */
+
+function toggleSortableRows(table, url, afterDoneCallback) {
+    var tbody = $(table).find('tbody');
+    if (tbody.hasClass('ui-sortable')) {
+        tbody.sortable('destroy');
+        return false;
+    }
+    tbody.sortable({
+        items: 'tr[data-object-id]',
+        axis: 'y',
+        cursor: 'move',
+        update: function(event, ui) {
+            var object_ids = tbody.find('tr[data-object-id]').map(function() {
+                return $(this).attr('data-object-id');
+            }).get();
+            $.ajax({
+                type: 'POST',
+                url: url,
+                data: {id: object_ids},
+                traditional: true,
+                headers: {'X-CSRFToken': getCookie('csrftoken')}
+            }).done(function(data) {
+                if (afterDoneCallback) {
+                    afterDoneCallback(data);
+                }
+            }).fail(function(jqXHR, textStatus, errorThrown) {
+                tbody.sortable('cancel');
+                display_server_error(errorThrown);
+            });
+        }
+    });
+    return true;
+}
+
+
+/**
+ * Live search for tables based on "frontend/objects_table.html".
+ *
+ * While the user types in the search box, the rows matching the term
+ * are requested (via ajax) from the current page with the "q" parameter,
+ * at most once per "delay" ms, and replace the table body.
+ *
+ * Sample call:
+ *
+ *     initTableSearch('.objects-search input[name=q]', '.objects-table');
+ */
+
+function initTableSearch(input, table, delay) {
+    var timer = null;
+    var request = null;
+    var last_term = $.trim($(input).val());
+    $(input).on('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            var term = $.trim($(input).val());
+            if (term == last_term) {
+                return;
+            }
+            last_term = term;
+            if (request) {
+                request.abort();
+            }
+            var params = new URLSearchParams(location.search);
+            params.set('q', term);
+            params.delete('cursor');
+            var url = location.pathname + '?' + params.toString();
+            request = $.ajax({
+                type: 'GET',
+                url: url
+            }).done(function(data) {
+                $(table).find('tbody').html(data);
+                history.replaceState(null, '', url);
+            }).fail(function(jqXHR, textStatus, errorThrown) {
+                if (textStatus != 'abort') {
+                    display_server_error(errorThrown);
+                }
+            });
+        }, delay || 300);
+    });
+}
+
+
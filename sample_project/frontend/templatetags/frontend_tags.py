@@ -1,8 +1,77 @@
+import uuid
+import hashlib
+import functools
 from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.urls import reverse
+from django.urls import get_script_prefix
+from django.urls import get_urlconf
+from django.utils import translation
+from django.utils.safestring import mark_safe
+from ..versioning import get_model_stamps
+from ..versioning import stamps_are_shared
+from ..formrendering import render_bootstrap_form
 
 register = template.Library()
 
+# Rendered table rows are cached (see "cacherow") for this many seconds
+ROW_CACHE_TIMEOUT = getattr(settings, 'FRONTEND_ROW_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+################################################################################
+# Fast url building for the object-related views.
+#
+# Each url is reversed only once per process (and script prefix),
+# with a placeholder in place of the object id; per-object urls are then
+# obtained by string concatenation
+
+_URL_PLACEHOLDER = uuid.UUID(int=0)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_url_template(view_name, app_label, model_name, with_object_id, extra_args, script_prefix, urlconf):
+    args = (app_label, model_name) + ((_URL_PLACEHOLDER, ) if with_object_id else ()) + extra_args
+    url = reverse(view_name, args=args, urlconf=urlconf)
+    if not with_object_id:
+        return url, None
+    head, tail = url.rsplit(str(_URL_PLACEHOLDER), 1)
+    return head, tail
+
+
+@receiver(setting_changed)
+def _clear_url_templates(sender, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _get_url_template.cache_clear()
+
+
+def model_url(view_name, model, *extra_args):
+    """
+    Same as reverse(view_name, args=(app_label, model_name) + extra_args)
+    """
+    url, tail = _get_url_template(
+        view_name, model._meta.app_label, model._meta.model_name,
+        False, extra_args, get_script_prefix(), get_urlconf()
+    )
+    return url
+
+
+def object_url(view_name, model, object_id, *extra_args):
+    """
+    Same as reverse(view_name, args=(app_label, model_name, object_id) + extra_args),
+    for views which receive the object id as <uuid:pk>
+    """
+    if not isinstance(object_id, uuid.UUID):
+        # let reverse() validate (and possibly reject) it
+        return reverse(view_name, args=(model._meta.app_label, model._meta.model_name, object_id) + extra_args)
+    head, tail = _get_url_template(
+        view_name, model._meta.app_label, model._meta.model_name,
+        True, extra_args, get_script_prefix(), get_urlconf()
+    )
+    return head + str(object_id) + tail
+
 
 @register.filter
 def model_verbose_name(model):
@@ -47,8 +116,7 @@ def change_object_url(object):
 
         <a href="{{object|change_object_url}}">change this object</a>
     """
-    model = object.__class__
-    return reverse('frontend:object-change', args=(model._meta.app_label, model._meta.model_name, object.id))
+    return object_url('frontend:object-change', object.__class__, object.id)
 
 
 @register.filter
@@ -58,7 +126,18 @@ def change_model_url(model, object_id):
 
         <a href="{{model|change_model_url:object.id}}">change this object</a>
     """
-    return reverse('frontend:object-change', args=(model._meta.app_label, model._meta.model_name, object_id))
+    return object_url('frontend:object-change', model, object_id)
+
+
+@register.filter
+def change_field_url(object, field_name):
+    """
+    Given an object and a field name, returns the url for updating only that field
+    (used for inline editing):
+
+        <td data-edit-url="{{object|change_field_url:'position'}}">{{object.position}}</td>
+    """
+    return object_url('frontend:object-field', object.__class__, object.id, field_name)
 
 
 @register.filter
@@ -68,7 +147,7 @@ def add_model_url(model):
 
         <a href="{{model|add_model_url}}">add a new object</a>
     """
-    return reverse('frontend:object-add', args=(model._meta.app_label, model._meta.model_name))
+    return model_url('frontend:object-add', model)
 
 
 @register.filter
@@ -78,8 +157,7 @@ def delete_object_url(object):
 
         <a href="{{object|delete_object_url}}">delete this object</a>
     """
-    model = object.__class__
-    return reverse('frontend:object-delete', args=(model._meta.app_label, model._meta.model_name, object.id))
+    return object_url('frontend:object-delete', object.__class__, object.id)
 
 
 @register.filter
@@ -89,7 +167,18 @@ def delete_model_url(model, object_id):
 
         <a href="{{model|delete_model_url:object.id}}">delete this object</a>
     """
-    return reverse('frontend:object-delete', args=(model._meta.app_label, model._meta.model_name, object_id))
+    return object_url('frontend:object-delete', model, object_id)
+
+
+@register.filter
+def delete_objects_model_url(model):
+    """
+    Given a model, returns the "canonical" url for deleting many objects at once
+    (the ids of the objects are posted as "id" parameters):
+
+        <a href="" onclick="confirmRemoteBulkAction('{{model|delete_objects_model_url}}', ...)">delete selected objects</a>
+    """
+    return model_url('frontend:objects-delete', model)
 
 
 @register.filter
@@ -99,8 +188,7 @@ def clone_object_url(object):
 
         <a href="{{object|clone_object_url}}">clone this object</a>
     """
-    model = object.__class__
-    return reverse('frontend:object-clone', args=(model._meta.app_label, model._meta.model_name, object.id))
+    return object_url('frontend:object-clone', object.__class__, object.id)
 
 
 @register.filter
@@ -110,7 +198,68 @@ def clone_model_url(model, object_id):
 
         <a href="{{model|clone_model_url:object.id}}">clone this object</a>
     """
-    return reverse('frontend:object-clone', args=(model._meta.app_label, model._meta.model_name, object_id))
+    return object_url('frontend:object-clone', model, object_id)
+
+
+@register.filter
+def clone_objects_model_url(model):
+    """
+    Given a model, returns the "canonical" url for cloning many objects at once
+    (the ids of the objects are posted as "id" parameters):
+
+        <a href="" onclick="confirmRemoteBulkAction('{{model|clone_objects_model_url}}', ...)">clone selected objects</a>
+    """
+    return model_url('frontend:objects-clone', model)
+
+
+@register.filter
+def export_objects_model_url(model, format='csv'):
+    """
+    Given a model, returns the "canonical" url for exporting all its objects
+    in the given format ("csv" or "json"):
+
+        <a href="{{model|export_objects_model_url:'json'}}">export all objects</a>
+    """
+    return model_url('frontend:objects-export', model) + '?format=' + format
+
+
+@register.filter
+def import_objects_model_url(model):
+    """
+    Given a model, returns the "canonical" url for importing many objects at once
+    (csv or json rows are posted as "file"):
+
+        <input type="file" onchange="importObjects('{{model|import_objects_model_url}}', this, ...)">
+    """
+    return model_url('frontend:objects-import', model)
+
+
+def has_model_perm(request, model, action):
+    """
+    Returns True iif the user have the specified permission over the model.
+
+    Results are memoized on the request, so that repeated checks
+    (i.e. for each row of a table) are resolved only once.
+    """
+    if isinstance(model, str):
+        app_label, model_name = model.split('.')
+    else:
+        app_label = model._meta.app_label
+        model_name = model._meta.model_name
+
+    user = request.user
+    key = (user.pk, app_label, model_name, action)
+    cache = getattr(request, '_model_perm_cache', None)
+    if cache is None:
+        cache = request._model_perm_cache = {}
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+
+    required_permission = '%s.%s_%s' % (app_label, action, model_name)
+    value = cache[key] = user.is_authenticated and user.has_perm(required_permission)
+    return value
 
 
 @register.simple_tag(takes_context=True)
@@ -126,14 +275,42 @@ def testhasperm(context, model, action):
             <h2>Sorry, you have no permission to view these objects</h2>
         {% endif %}
     """
-    user = context['request'].user
-    if isinstance(model, str):
-        app_label, model_name = model.split('.')
-    else:
-        app_label = model._meta.app_label
-        model_name = model._meta.model_name
-    required_permission = '%s.%s_%s' % (app_label, action, model_name)
-    return user.is_authenticated and user.has_perm(required_permission)
+    return has_model_perm(context['request'], model, action)
+
+
+@register.simple_tag(takes_context=True)
+def modelperms(context, model):
+    """
+    Resolves all standard permissions over the model at once;
+    useful to hoist permission checks out of loops.
+
+    Sample usage:
+
+        {% modelperms model as model_perms %}
+        {% for object in objects %}
+            {% if model_perms.change %}
+                ...
+            {% endif %}
+        {% endfor %}
+    """
+    request = context['request']
+    return {
+        action: has_model_perm(request, model, action)
+        for action in ('view', 'add', 'change', 'delete')
+    }
+
+
+@register.simple_tag
+def prerendered_bootstrap_form(form):
+    """
+    Same as {% bootstrap_form form %}, but the bootstrap layout is rendered
+    only once per form class (see formrendering.py).
+
+    Sample usage:
+
+        {% prerendered_bootstrap_form form %}
+    """
+    return render_bootstrap_form(form)
 
 
 @register.tag
@@ -194,3 +371,103 @@ class CheckPermNode(template.Node):
             html = self.states['else'].render(context) if 'else' in self.states else ''
 
         return html
+
+
+@register.tag
+def cacherow(parser, token):
+    """
+    Cache the rendered content for each object of a list.
+
+    The cache key includes the object's version (or, failing that, the change stamp
+    of its model), the user's permissions over the model, the current language and
+    the change stamps of the models referenced by ForeignKeys; so a row is rendered
+    again only after any of these changed. Keys are retrieved with a single query
+    for all the objects of the list.
+
+    Stamps must be shared by all processes (see versioning.stamps_are_shared());
+    otherwise, only the rows of versioned objects without ForeignKeys are cached.
+
+    Sample usage:
+
+        {% for object in objects %}
+            {% cacherow object in objects %}
+                <tr>...</tr>
+            {% endcacherow %}
+        {% endfor %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 4 or bits[2] != 'in':
+        raise template.TemplateSyntaxError("'%s' tag requires the form: {%% %s object in objects %%}" % (bits[0], bits[0]))
+    nodelist = parser.parse(('endcacherow', ))
+    parser.delete_first_token()
+    return CacheRowNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[3]))
+
+
+class CacheRowNode(template.Node):
+    def __init__(self, nodelist, object_var, objects_var):
+        self.nodelist = nodelist
+        self.object_var = object_var
+        self.objects_var = objects_var
+
+    def get_cache_keys(self, context, objects):
+        """
+        Returns the cache keys of all objects, by pk
+        """
+        keys = {}
+        if not objects:
+            return keys
+        model = objects[0].__class__
+        versioned = (
+            any(field.name == 'version' for field in model._meta.concrete_fields) and
+            'version' not in objects[0].get_deferred_fields()
+        )
+        related_models = [
+            field.related_model
+            for field in model._meta.concrete_fields
+            if field.many_to_one or field.one_to_one
+        ]
+        if not versioned:
+            related_models.append(model)
+        if related_models and not stamps_are_shared():
+            # Changes made by other processes would go unnoticed: don't cache
+            return keys
+        stamps = get_model_stamps(related_models) if related_models else {}
+
+        request = context.get('request')
+        perms = [
+            action
+            for action in ('view', 'add', 'change', 'delete')
+            if request is not None and has_model_perm(request, model, action)
+        ]
+        prefix = '|'.join([
+            context.template.name or '',
+            model._meta.label_lower,
+            ','.join(perms),
+            translation.get_language() or '',
+            ','.join('%s:%r' % (related._meta.label_lower, stamp) for related, stamp in sorted(
+                stamps.items(), key=lambda item: item[0]._meta.label_lower)),
+        ])
+        for object in objects:
+            parts = [prefix, str(object.pk)]
+            if versioned:
+                parts.append(str(object.version))
+            keys[object.pk] = 'frontend:row:%s' % hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+        return keys
+
+    def render(self, context):
+        object = self.object_var.resolve(context)
+
+        # Keys and cached rows are retrieved at once for the whole list
+        if self not in context.render_context:
+            keys = self.get_cache_keys(context, list(self.objects_var.resolve(context)))
+            context.render_context[self] = (keys, cache.get_many(list(keys.values())))
+        keys, rows = context.render_context[self]
+
+        key = keys.get(object.pk)
+        if key is None:
+            return self.nodelist.render(context)
+        if key not in rows:
+            rows[key] = self.nodelist.render(context)
+            cache.set(key, rows[key], ROW_CACHE_TIMEOUT)
+        return mark_safe(rows[key])
+
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from backend.models import Artist
+from backend.models import Album
+from backend.models import Song
+
+
+class ListingQueriesTestCase(TestCase):
+    """
+    The number of queries run by a listing page must not grow with
+    the number of rows (related objects are retrieved with select_related())
+    """
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser('admin', 'admin@localhost', 'admin')
+        self.client.force_login(user)
+
+    def add_objects(self, n_artists, albums_per_artist=2, songs_per_album=3):
+        for i in range(n_artists):
+            artist = Artist.objects.create(description='Artist %d' % i)
+            for j in range(albums_per_artist):
+                album = Album.objects.create(description='Album %d.%d' % (i, j), artist=artist)
+                for k in range(songs_per_album):
+                    Song.objects.create(description='Song %d.%d.%d' % (i, j, k), album=album, position=k)
+
+    def assertListingQueries(self, url, num):
+        # session + user, plus the listing queries
+        for n_artists in (2, 10):
+            self.add_objects(n_artists)
+            cache.clear()
+            with self.assertNumQueries(num):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_songs(self):
+        self.assertListingQueries(reverse('frontend:songs'), 3)
+
+    def test_artists_and_albums(self):
+        self.assertListingQueries(reverse('frontend:artists-and-albums'), 4)
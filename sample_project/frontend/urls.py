@@ -1,5 +1,7 @@
+import django
 from django.urls import path
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.views.generic import TemplateView
 from django.contrib.auth import views as auth_views
 from . import views
@@ -7,6 +9,13 @@ from . import forms
 
 app_name = 'frontend'
 
+# Views which have an asynchronous variant (see async_views.py)
+async_capable_views = views
+if getattr(settings, 'FRONTEND_ASYNC_VIEWS', False):
+    if django.VERSION < (3, 1):
+        raise ImproperlyConfigured('FRONTEND_ASYNC_VIEWS requires Django 3.1 or later')
+    from . import async_views as async_capable_views
+
 
 urlpatterns = [
     path('', TemplateView.as_view(template_name="frontend/index.html"), name="index"),
@@ -41,7 +50,7 @@ urlpatterns = [
     path('simple-content', views.simple_content, name="simple-content"),
     path('simple-content-forbidden', views.simple_content_forbidden, name="simple-content-forbidden"),
     path('simple-content2', views.simple_content2, name="simple-content2"),
-    path('simple-form', views.simple_form, name="simple-form"),
+    path('simple-form', async_capable_views.simple_form, name="simple-form"),
     path('artist/create/', views.artist_create, name="artist-create"),
     path('artist/<uuid:pk>/update/', views.artist_update, name="artist-update"),
 
@@ -56,12 +65,24 @@ urlpatterns = [
         views.generic_edit_view,
         {'model_form_class': forms.AlbumEditForm},
         name="album-change"),
+    path('album/<uuid:pk>/reorder-songs/', views.reorder_album_songs, name="album-reorder-songs"),
 
     # Edit any object
     path('object/<str:app_label>/<str:model_name>/add/', views.edit_object, name="object-add"),
     path('object/<str:app_label>/<str:model_name>/<uuid:pk>/change/', views.edit_object, name="object-change"),
+    path('object/<str:app_label>/<str:model_name>/<uuid:pk>/field/<str:field_name>/',
+        views.edit_object_field,
+        name="object-field"),
+    path('object/<str:app_label>/<str:model_name>/search/', views.search_objects, name="object-search"),
+    path('object/<str:app_label>/<str:model_name>/export/', views.export_objects, name="objects-export"),
+    path('object/<str:app_label>/<str:model_name>/import/', views.import_objects, name="objects-import"),
 
     # Delete and clone
     path('object/<str:app_label>/<str:model_name>/<uuid:pk>/delete/', views.delete_object, name="object-delete"),
+    path('object/<str:app_label>/<str:model_name>/delete/', views.delete_objects, name="objects-delete"),
     path('object/<str:app_label>/<str:model_name>/<uuid:pk>/clone/', views.clone_object, name="object-clone"),
+    path('object/<str:app_label>/<str:model_name>/clone/', views.clone_objects, name="objects-clone"),
+
+    # Instrumentation
+    path('instrumentation/stats/', views.instrumentation_stats, name="instrumentation-stats"),
 ]
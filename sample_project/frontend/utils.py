@@ -1,12 +1,30 @@
+import json
 import uuid
+import hashlib
+from django import forms
+from django.conf import settings
+from django.utils import translation
 from django.http import Http404
+from django.http import QueryDict
 from django.shortcuts import get_object_or_404
+from .versioning import get_model_stamps
+from .widgets import AutocompleteModelChoiceField
+from .versioning import stamps_are_shared
+
+
+# Max number of objects handled by a single query in bulk operations
+BULK_BATCH_SIZE = getattr(settings, 'FRONTEND_BULK_BATCH_SIZE', 500)
 
 
 def get_object_by_uuid_or_404(model, uuid_pk):
     """
     Calls get_object_or_404(model, pk=uuid_pk)
-    but also prevents "badly formed hexadecimal UUID string" unhandled exception
+    but also prevents "badly formed hexadecimal UUID string" unhandled exception.
+
+    As with get_object_or_404(), "model" can also be a QuerySet,
+    i.e. to load only some fields, or to follow ForeignKeys:
+
+        get_object_by_uuid_or_404(Song.objects.only('id', 'album'), pk)
     """
     if isinstance(uuid_pk, str):
         try:
@@ -14,3 +32,119 @@ def get_object_by_uuid_or_404(model, uuid_pk):
         except Exception as e:
             raise Http404(str(e))
     return get_object_or_404(model, pk=uuid_pk)
+
+
+def accepts_json(request):
+    """
+    Content negotiation: True when the client prefers json over html
+    (that is, "application/json" comes first in the Accept header)
+    """
+    media_types = request.META.get('HTTP_ACCEPT', '').split(',')
+    return media_types[0].split(';')[0].strip() == 'application/json'
+
+
+def get_request_data(request):
+    """
+    Returns the submitted data for POST as well as for PUT/PATCH requests
+    (which Django doesn't parse); both form-encoded and json bodies are accepted
+    """
+    if request.method == 'POST' and request.content_type != 'application/json':
+        return request.POST
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body.decode(request.encoding or 'utf-8'))
+        except ValueError as e:
+            raise Http404('Invalid json data: %s' % e)
+        if not isinstance(data, dict):
+            raise Http404('Invalid json data: an object is expected')
+        return data
+    return QueryDict(request.body, encoding=request.encoding)
+
+
+def get_expected_version(request):
+    """
+    Returns the object version posted along with the form
+    (see BaseModel.save()), or None
+    """
+    try:
+        return int(request.POST['version'])
+    except (KeyError, ValueError):
+        return None
+
+
+def get_form_errors(form):
+    """
+    Returns form errors as a json-serializable dict:
+    {field_name: [message, ...]}, with "__all__" for non-field errors
+    """
+    return {
+        name: [error['message'] for error in errors]
+        for name, errors in form.errors.get_json_data().items()
+    }
+
+
+def get_form_validators(request, model_form_class):
+    """
+    Returns an (etag, last_modified) pair describing the rendered unbound form.
+
+    The markup depends on the form class, the user's CSRF cookie and language,
+    and on the choices offered for related models (tracked by their change stamps).
+
+    Returns (None, None) when the stamps are not shared by all processes.
+    """
+    # Autocomplete fields render no choices
+    related_models = [
+        field.queryset.model
+        for field in model_form_class.base_fields.values()
+        if isinstance(field, forms.ModelChoiceField) and not isinstance(field, AutocompleteModelChoiceField)
+    ]
+    if related_models and not stamps_are_shared():
+        return None, None
+    stamps = get_model_stamps(related_models) if related_models else {}
+    parts = [
+        model_form_class.__module__,
+        model_form_class.__qualname__,
+        str(request.user.pk),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        translation.get_language() or '',
+    ]
+    for model, stamp in stamps.items():
+        parts.append('%s:%r' % (model._meta.label_lower, stamp))
+    etag = '"%s"' % hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    last_modified = int(max(stamps.values())) if stamps else None
+    return etag, last_modified
+
+
+def get_object_row_data(object):
+    """
+    Returns a json-serializable description of the object,
+    used by the client to refresh the object's table row in place
+    """
+    fields = {}
+    for field in object._meta.concrete_fields:
+        value = getattr(object, field.name)
+        fields[field.name] = '' if value is None else str(value)
+    return {
+        'id': str(object.pk),
+        'text': str(object),
+        'fields': fields,
+    }
+
+
+def parse_uuid_list(values):
+    """
+    Converts a list of strings into a list of UUIDs;
+    raises Http404 if any of them is badly formed
+    """
+    try:
+        return [uuid.UUID(str(value)) for value in values]
+    except ValueError as e:
+        raise Http404(str(e))
+
+
+def chunked(items, size=BULK_BATCH_SIZE):
+    """
+    Split a list into consecutive chunks of at most "size" items
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -0,0 +1,74 @@
+import time
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.cache import cache
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import post_save
+from django.db.models.signals import post_delete
+
+
+# Apps whose models are tracked; any save or delete "touches" the model
+VERSIONED_APPS = getattr(settings, 'FRONTEND_VERSIONED_APPS', ['backend', ])
+
+# Set to True when the site is served by a single process; with several processes
+# (i.e. gunicorn workers), stamps must be kept in a cache shared by all of them
+LOCAL_STAMPS_ALLOWED = getattr(settings, 'FRONTEND_LOCAL_STAMPS_ALLOWED', False)
+
+
+def _stamp_key(model):
+    return 'frontend:model-stamp:%s' % model._meta.label_lower
+
+
+def stamps_are_shared():
+    """
+    True when the stamps can be trusted by all processes serving the site.
+
+    A process-local cache (i.e. the default LocMemCache) only sees the changes
+    made by the process itself: other processes would keep serving content
+    derived from stale stamps. Consumers should then do without them,
+    unless LOCAL_STAMPS_ALLOWED.
+    """
+    return LOCAL_STAMPS_ALLOWED or not isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def get_model_stamps(models):
+    """
+    Returns a dict {model: timestamp of the last change of any of its objects}.
+
+    Stamps are kept in the default cache; a missing stamp is initialized
+    with the current time, which errs on the safe side (consumers will
+    consider the model as just changed).
+    """
+    keys = {_stamp_key(model): model for model in models}
+    stamps = cache.get_many(list(keys.keys()))
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, time.time(), None)
+            stamps[key] = cache.get(key)
+    return {model: stamps[key] for key, model in keys.items()}
+
+
+def get_model_stamp(model):
+    return get_model_stamps([model])[model]
+
+
+def touch_model(model):
+    """
+    Record that some objects of the given model have changed;
+    to be called explicitly after bulk operations which don't send signals
+    (i.e. bulk_create() and QuerySet.update())
+    """
+    cache.set(_stamp_key(model), time.time(), None)
+
+
+def _on_model_changed(sender, **kwargs):
+    touch_model(sender)
+
+
+def connect_signals():
+    for app_label in VERSIONED_APPS:
+        for model in apps.get_app_config(app_label).get_models():
+            post_save.connect(_on_model_changed, sender=model, dispatch_uid='frontend-touch-model')
+            post_delete.connect(_on_model_changed, sender=model, dispatch_uid='frontend-touch-model')
@@ -1,17 +1,58 @@
+import copy
 import time
 from django.apps import apps
 from django.shortcuts import render
 from django.contrib import messages
 from django.http import HttpResponse
 from django.http import HttpResponseRedirect
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.http import Http404
+from django.db import transaction
+from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_http_methods
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
 from backend.models import Artist
 from backend.models import Album
 from backend.models import Song
+from backend.models import BaseModel
+from backend.models import VersionConflict
 from .utils import get_object_by_uuid_or_404
+from .utils import parse_uuid_list
+from .utils import chunked
+from .utils import get_object_row_data
+from .utils import accepts_json
+from .utils import get_form_errors
+from .utils import get_form_validators
+from .utils import get_request_data
+from .utils import get_expected_version
+from .versioning import touch_model
+from .middleware import INSTRUMENTATION_ENABLED
+from . import instrumentation
+from .export import EXPORT_FORMATS
+from .export import get_export_fields
+from .export import iter_csv
+from .export import iter_json
+from .importing import read_import_rows
+from .importing import import_objects as bulk_import_objects
+from .importing import iter_ndjson
+from .listing import paginate_request
+from .listing import plan_queryset
+from .listing import SEARCH_KEY
+from .listing import annotate_search_key
+from .listing import search_queryset
+from .listing import search_request
+from .listing import keyset_paginate
+from .listing import render_listing
 from .forms import get_model_form_class
+from .forms import get_model_field_form_class
+from .forms import get_autocomplete_field_names
 from .forms import SimpleForm
 from .forms import ArtistCreateForm
 from .forms import ArtistUpdateForm
@@ -70,7 +111,7 @@ def simple_form(request):
 def artists(request):
     template_name = 'frontend/artists.html'
     return render(request, template_name, {
-        'artists': Artist.objects.all()
+        'artists': paginate_request(request, Artist.objects.all()),
     })
 
 
@@ -78,7 +119,7 @@ def artists(request):
 def artists2(request):
     template_name = 'frontend/artists2.html'
     return render(request, template_name, {
-        'artists': Artist.objects.all()
+        'artists': paginate_request(request, Artist.objects.all()),
     })
 
 
@@ -86,17 +127,39 @@ def artists2(request):
 def artists_and_albums(request):
     template_name = 'frontend/artists_and_albums.html'
     return render(request, template_name, {
-        'artists': Artist.objects.all(),
-        'albums': Album.objects.all(),
+        'artists': paginate_request(request, Artist.objects.all(), cursor_param='artists_cursor'),
+        'albums': paginate_request(
+            request,
+            plan_queryset(Album.objects.all(), ['artist', 'description', 'year']),
+            cursor_param='albums_cursor'
+        ),
     })
 
 
 @login_required
+@ensure_csrf_cookie
 def songs(request):
     template_name = 'frontend/songs.html'
-    return render(request, template_name, {
+    queryset = plan_queryset(
+        Song.objects.all(),
+        ['id', 'album', 'position', 'description', 'version'],
+        restrict_fields=True
+    )
+    if 'pk' in request.GET:
+        # Only the rows of the requested objects (used to refresh the table in place)
+        queryset = queryset.filter(pk__in=parse_uuid_list(request.GET.getlist('pk')))
+    album = None
+    if 'album' in request.GET:
+        # The songs of a single album, which can be reordered
+        album = get_object_by_uuid_or_404(Album, request.GET['album'])
+        queryset = queryset.filter(album=album)
+    queryset = search_request(request, queryset)
+    page = paginate_request(request, queryset)
+    return render_listing(request, template_name, {
         'model': Song,
-        'objects': Song.objects.all(),
+        'objects': page.object_list,
+        'page': page,
+        'album': album,
     })
 
 
@@ -244,8 +307,12 @@ def generic_edit_view(request, model_form_class, pk=None):
         object = None
         required_permission = '%s.add_%s' % (app_label, model_name)
     else:
-        # Change mode
-        object = get_object_by_uuid_or_404(model_class, pk)
+        # Change mode; the objects shown by autocomplete widgets are retrieved as well
+        queryset = model_class.objects.all()
+        related = get_autocomplete_field_names(model_form_class)
+        if related:
+            queryset = queryset.select_related(*related)
+        object = get_object_by_uuid_or_404(queryset, pk)
         required_permission = '%s.change_%s' % (app_label, model_name)
 
     # Check user permissions
@@ -258,10 +325,53 @@ def generic_edit_view(request, model_form_class, pk=None):
     else:
         template_name = 'frontend/includes/generic_form.html'
 
+    # The empty "add" form in a modal can be revalidated by the client
+    etag = last_modified = None
+    if request.method == 'GET' and object is None and request.is_ajax():
+        etag, last_modified = get_form_validators(request, model_form_class)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+
+    row = None
+    status = 200
     if request.method == 'POST':
         form = model_form_class(instance=object, data=request.POST)
         if form.is_valid():
-            object = form.save()
+            try:
+                # Conditional update, when the form carries the version of the object
+                object = form.save(commit=False)
+                expected_version = get_expected_version(request)
+                if expected_version is not None and isinstance(object, BaseModel):
+                    object.save(expected_version=expected_version)
+                else:
+                    object.save()
+                form.save_m2m()
+            except VersionConflict:
+                # Somebody else changed the object after the form was loaded:
+                # answer with the current version, so that a new submission can override it
+                object = get_object_by_uuid_or_404(model_class, pk)
+                message = 'This %s has been changed by someone else in the meantime; ' \
+                    'send the form again to overwrite those changes.' % model_class._meta.verbose_name
+                if accepts_json(request):
+                    return JsonResponse({
+                        'ok': False,
+                        'object_id': str(object.pk),
+                        'version': object.version,
+                        'errors': {'__all__': [message, ]},
+                        'row': get_object_row_data(object),
+                    }, status=409)
+                form.add_error(None, message)
+                status = 409
+        if form.is_valid():
+            if accepts_json(request):
+                # Compact answer: no need to render the form again
+                return JsonResponse({
+                    'ok': True,
+                    'object_id': str(object.pk),
+                    'errors': {},
+                    'row': get_object_row_data(object),
+                })
             if not request.is_ajax():
                 # reload the page
                 if pk is None:
@@ -271,13 +381,107 @@ def generic_edit_view(request, model_form_class, pk=None):
                 messages.success(request, message)
                 next = request.META['PATH_INFO']
                 return HttpResponseRedirect(next)
-            # if is_ajax(), we just return the validated form, so the modal will close
+            # if is_ajax(), we just return the validated form, so the modal will close;
+            # we also supply the new row data, to let the client refresh the table in place
+            row = get_object_row_data(object)
+        elif accepts_json(request):
+            # Send back field errors only; the client will patch the form in place
+            return JsonResponse({
+                'ok': False,
+                'object_id': str(object.pk) if object else '',
+                'errors': get_form_errors(form),
+            })
     else:
         form = model_form_class(instance=object)
 
-    return render(request, template_name, {
+    response = render(request, template_name, {
         'object': object,
         'form': form,
+        'row': row,
+    }, status=status)
+    if etag is not None:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+################################################################################
+# Update a single field of an object (used for inline editing)
+
+@require_http_methods(['POST', 'PATCH'])
+def edit_object_field(request, app_label, model_name, pk, field_name):
+    """
+    Validate and save the supplied value of a single field;
+    the value is posted (either form-encoded or as json) under the field name.
+
+    Answers with the same json as generic_edit_view().
+    """
+
+    required_permission = '%s.change_%s' % (app_label, model_name)
+    if not request.user.is_authenticated or not request.user.has_perm(required_permission):
+        raise PermissionDenied
+
+    try:
+        model_form_class = get_model_field_form_class(app_label, model_name, field_name)
+    except LookupError as e:
+        raise Http404(str(e))
+
+    # The row data include related objects: load them along with the object
+    model = model_form_class._meta.model
+    queryset = plan_queryset(model.objects.all(), [
+        field.name for field in model._meta.concrete_fields if field.many_to_one or field.one_to_one
+    ])
+    object = get_object_by_uuid_or_404(queryset, pk)
+    form = model_form_class(instance=object, data=get_request_data(request))
+    if not form.is_valid():
+        return JsonResponse({
+            'ok': False,
+            'object_id': str(object.pk),
+            'errors': get_form_errors(form),
+        })
+
+    object = form.save(commit=False)
+    object.save(update_fields=[object._meta.get_field(field_name).name, ])
+    return JsonResponse({
+        'ok': True,
+        'object_id': str(object.pk),
+        'errors': {},
+        'row': get_object_row_data(object),
+    })
+
+
+################################################################################
+# Searching objects (used by autocomplete widgets)
+
+SEARCH_PAGE_SIZE = 20
+
+
+def search_objects(request, app_label, model_name):
+    """
+    Returns as json a page of objects whose description starts with the "q" parameter;
+    the "next" cursor, if any, can be supplied as "cursor" parameter to get the following page
+    """
+
+    # As for the admin's autocomplete, either view or change permission will do
+    # (i.e. to pick the Artist of an Album)
+    required_permissions = [
+        '%s.%s_%s' % (app_label, action, model_name)
+        for action in ('view', 'change')
+    ]
+    if not request.user.is_authenticated or not any(request.user.has_perm(p) for p in required_permissions):
+        raise PermissionDenied
+
+    model = apps.get_model(app_label, model_name)
+    # Sorted as the search index, so that a page is read straight from it
+    queryset = annotate_search_key(model.objects.all()).order_by(SEARCH_KEY)
+    queryset = search_queryset(queryset, request.GET.get('q', ''))
+    page = keyset_paginate(queryset, cursor=request.GET.get('cursor'), page_size=SEARCH_PAGE_SIZE)
+
+    return JsonResponse({
+        'results': [{'id': str(object.pk), 'text': str(object)} for object in page],
+        'next': page.next_cursor,
     })
 
 
@@ -290,12 +494,44 @@ def delete_object(request, app_label, model_name, pk):
     if not request.user.is_authenticated or not request.user.has_perm(required_permission):
         raise PermissionDenied
 
+    # A single query (or collection) which both checks existence and deletes;
+    # delete signals are sent only for the rows actually loaded
     model = apps.get_model(app_label, model_name)
-    object = get_object_by_uuid_or_404(model, pk)
-    object_id = object.id
-    object.delete()
+    deleted, deleted_per_model = model._default_manager.filter(pk=pk).delete()
+    if not deleted:
+        raise Http404('No %s matches the given query.' % model._meta.object_name)
+
+    return HttpResponse(pk)
+
+
+################################################################################
+# Deleting many objects at once
+
+@require_POST
+def delete_objects(request, app_label, model_name):
+    """
+    Delete all objects listed in the "id" POST parameter;
+    returns the list of deleted ids as json
+    """
+
+    required_permission = '%s.delete_%s' % (app_label, model_name)
+    if not request.user.is_authenticated or not request.user.has_perm(required_permission):
+        raise PermissionDenied
 
-    return HttpResponse(object_id)
+    model = apps.get_model(app_label, model_name)
+    object_ids = parse_uuid_list(request.POST.getlist('id'))
+
+    deleted_ids = []
+    with transaction.atomic():
+        for chunk in chunked(object_ids):
+            queryset = model.objects.filter(pk__in=chunk)
+            ids = list(queryset.values_list('pk', flat=True))
+            queryset.delete()
+            deleted_ids += ids
+
+    return JsonResponse({
+        'deleted': [str(object_id) for object_id in deleted_ids],
+    })
 
 
 ################################################################################
@@ -308,6 +544,163 @@ def clone_object(request, app_label, model_name, pk):
         raise PermissionDenied
 
     model = apps.get_model(app_label, model_name)
-    object = get_object_by_uuid_or_404(model, pk)
+    queryset = model.objects.all()
+    as_json = request.GET.get('format') == 'json'
+    if as_json:
+        # The row data include related objects: load them along with the object
+        # (the clone receives them from its source)
+        queryset = plan_queryset(queryset, [
+            field.name for field in model._meta.concrete_fields if field.many_to_one or field.one_to_one
+        ])
+    object = get_object_by_uuid_or_404(queryset, pk)
     new_object = object.clone(request)
+
+    # Optionally return the row data of the new object
+    if as_json:
+        return JsonResponse(get_object_row_data(new_object))
     return HttpResponse(new_object.id)
+
+
+################################################################################
+# Cloning many objects at once
+
+@require_POST
+def clone_objects(request, app_label, model_name):
+    """
+    Clone all objects listed in the "id" POST parameter;
+    when the "deep" POST parameter is set, related objects are cloned as well.
+
+    Returns a json mapping of the source ids to the new ids
+    """
+
+    required_permission = '%s.add_%s' % (app_label, model_name)
+    if not request.user.is_authenticated or not request.user.has_perm(required_permission):
+        raise PermissionDenied
+
+    model = apps.get_model(app_label, model_name)
+    object_ids = parse_uuid_list(request.POST.getlist('id'))
+    deep = request.POST.get('deep', '') not in ('', '0', 'false')
+
+    objects = []
+    for chunk in chunked(object_ids):
+        objects += model.objects.filter(pk__in=chunk)
+    new_objects = model.bulk_clone(objects, request, deep=deep)
+
+    # bulk_create() sends no signals
+    touch_model(model)
+    if deep:
+        for name in model.cloned_relations:
+            touch_model(model._meta.get_field(name).related_model)
+
+    return JsonResponse({
+        'cloned': {
+            str(object.id): str(new_object.id)
+            for object, new_object in zip(objects, new_objects)
+        },
+    })
+
+
+################################################################################
+# Reordering the songs of an album
+
+@require_POST
+def reorder_album_songs(request, pk):
+    """
+    Renumber the songs of the album following the order of the "id" POST parameters,
+    which must list all songs of the album.
+
+    Returns a json mapping of song ids to their new positions
+    """
+
+    if not request.user.is_authenticated or not request.user.has_perm('backend.change_song'):
+        raise PermissionDenied
+
+    album = get_object_by_uuid_or_404(Album, pk)
+    song_ids = parse_uuid_list(request.POST.getlist('id'))
+    if len(set(song_ids)) != len(song_ids) or set(song_ids) != set(album.song_set.values_list('id', flat=True)):
+        raise Http404('The list of songs does not match the album')
+
+    positions = Song.reorder(album, song_ids)
+
+    # QuerySet.update() sends no signals
+    touch_model(Song)
+
+    return JsonResponse({
+        'positions': {str(song_id): position for song_id, position in positions.items()},
+    })
+
+
+################################################################################
+# Exporting all objects of a model
+
+def export_objects(request, app_label, model_name):
+    """
+    Stream all objects of the model as csv (default) or json, according
+    to the "format" parameter; rows are fetched from the database in chunks,
+    so memory usage doesn't depend on the size of the table
+    """
+
+    required_permission = '%s.view_%s' % (app_label, model_name)
+    if not request.user.is_authenticated or not request.user.has_perm(required_permission):
+        raise PermissionDenied
+
+    format = request.GET.get('format', 'csv')
+    if format not in EXPORT_FORMATS:
+        raise Http404('Unsupported format "%s"' % format)
+
+    model = apps.get_model(app_label, model_name)
+    fields = get_export_fields(model)
+    if format == 'json':
+        content = iter_json(model.objects.all(), fields)
+    else:
+        content = iter_csv(model.objects.all(), fields)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[format])
+    response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (model_name, format)
+    return response
+
+
+################################################################################
+# Importing many objects at once
+
+@require_POST
+def import_objects(request, app_label, model_name):
+    """
+    Create objects from the csv or json rows supplied as "file" (or as the request body);
+    rows are validated with the model's ModelForm and inserted in batches.
+
+    The import is completed (and committed) before answering; the errors
+    of the invalid rows, followed by the totals, are then streamed back
+    as newline delimited json.
+    """
+
+    required_permission = '%s.add_%s' % (app_label, model_name)
+    if not request.user.is_authenticated or not request.user.has_perm(required_permission):
+        raise PermissionDenied
+
+    model_form_class = get_model_form_class(app_label, model_name)
+    rows = read_import_rows(request)
+    results = iter_ndjson(bulk_import_objects(model_form_class, rows))
+    return StreamingHttpResponse(results, content_type='application/x-ndjson')
+
+
+################################################################################
+# Instrumentation stats (see InstrumentationMiddleware)
+
+def instrumentation_stats(request):
+    """
+    Returns as json the timings accumulated by view since the process started;
+    "?reset=1" clears them afterwards
+    """
+
+    if not INSTRUMENTATION_ENABLED:
+        raise Http404
+    if not request.user.is_authenticated or not request.user.is_staff:
+        raise PermissionDenied
+
+    with instrumentation._lock:
+        stats = copy.deepcopy(instrumentation.view_stats)
+    if request.GET.get('reset'):
+        instrumentation.reset()
+
+    return JsonResponse({'views': stats})
@@ -0,0 +1,75 @@
+from django import forms
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Widget):
+    """
+    A widget for ModelChoiceField (i.e. ForeignKey) which, instead of listing
+    all related objects in a <select>, lets the user search them via ajax;
+    only the currently selected object is retrieved when rendering.
+
+    Results are provided by the generic "frontend:object-search" end-point.
+    """
+    template_name = 'frontend/widgets/autocomplete_select.html'
+
+    # The related object cached on the form's instance, if any (see AutocompleteBoundField)
+    selected_object = None
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        model = self.choices.queryset.model
+        context['widget'].update({
+            'label': self.get_label(value),
+            'search_url': reverse('frontend:object-search', args=(model._meta.app_label, model._meta.model_name)),
+        })
+        return context
+
+    def get_label(self, value):
+        if value in (None, ''):
+            return ''
+        selected = self.selected_object
+        if selected is not None:
+            key = self.choices.field.to_field_name or 'pk'
+            if str(getattr(selected, key)) == str(value):
+                return str(selected)
+        try:
+            object = self.choices.queryset.filter(pk=value).first()
+        except (ValueError, ValidationError):
+            object = None
+        return str(object) if object is not None else ''
+
+
+class AutocompleteBoundField(forms.BoundField):
+    """
+    Hands to the widget the related object already cached on the form's instance
+    (i.e. retrieved with select_related()), to save the widget a query
+    """
+
+    def as_widget(self, widget=None, attrs=None, only_initial=False):
+        widget = widget or self.field.widget
+        widget.selected_object = self.get_cached_object()
+        return super().as_widget(widget, attrs, only_initial)
+
+    def get_cached_object(self):
+        instance = getattr(self.form, 'instance', None)
+        if instance is None:
+            return None
+        try:
+            model_field = instance._meta.get_field(self.name)
+        except FieldDoesNotExist:
+            return None
+        if model_field.is_relation and model_field.is_cached(instance):
+            return model_field.get_cached_value(instance)
+        return None
+
+
+class AutocompleteModelChoiceField(forms.ModelChoiceField):
+    """
+    A ModelChoiceField edited with AutocompleteSelect
+    """
+    widget = AutocompleteSelect
+
+    def get_bound_field(self, form, field_name):
+        return AutocompleteBoundField(form, self, field_name)
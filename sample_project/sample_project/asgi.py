@@ -0,0 +1,17 @@
+"""
+ASGI config for sample_project project (requires Django 3.1 or later).
+
+It exposes the ASGI callable as a module-level variable named ``application``;
+set FRONTEND_ASYNC_VIEWS = True to serve the asynchronous views of the frontend app.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/stable/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sample_project.settings')
+
+application = get_asgi_application()
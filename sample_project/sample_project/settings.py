@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'frontend.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -124,3 +125,19 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Frontend
+
+# Record SQL, template and frontend_tags timings
+# (sent as "Server-Timing" headers, and collected at /instrumentation/stats/)
+FRONTEND_INSTRUMENTATION = DEBUG
+
+# The development server runs a single process, so the default (process-local)
+# cache can hold the change stamps used by the rows cache and the form ETags;
+# with several processes, configure a shared cache instead (see settings_production.py)
+FRONTEND_LOCAL_STAMPS_ALLOWED = DEBUG
+
+# Serve simple_form asynchronously (see frontend/async_views.py)
+# (requires Django 3.1 or later, and an ASGI server: see asgi.py)
+FRONTEND_ASYNC_VIEWS = False
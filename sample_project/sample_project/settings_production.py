@@ -0,0 +1,72 @@
+"""
+Production settings for sample_project project.
+
+Usage:
+
+    DJANGO_SETTINGS_MODULE=sample_project.settings_production
+
+Secrets and hosts are read from the environment:
+
+    DJANGO_SECRET_KEY       (required)
+    DJANGO_ALLOWED_HOSTS    comma separated list (default: "localhost")
+    DJANGO_CONN_MAX_AGE     seconds a database connection is kept open (default: 600)
+    DJANGO_CACHE_BACKEND    (default: memcached, which requires python-memcached)
+    DJANGO_CACHE_LOCATION   (default: "127.0.0.1:11211")
+
+See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
+"""
+
+import os
+from django.core.exceptions import ImproperlyConfigured
+from .settings import *
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('The DJANGO_SECRET_KEY environment variable is not set')
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+# Templates are read and compiled once per process, instead of at every request
+# (i.e. generic_form_inner.html and the bootstrap3 field templates, at each modal open).
+# With DEBUG off and no "loaders", Django already enables the cached loader:
+# the "loaders" below only make it explicit (which requires APP_DIRS to be omitted)
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Persistent database connections
+DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DJANGO_CONN_MAX_AGE', 600))
+
+# A cache shared by all processes: the rows cache and the form ETags
+# rely on the change stamps kept here (see frontend/versioning.py)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.memcached.MemcachedCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', '127.0.0.1:11211'),
+    }
+}
+FRONTEND_LOCAL_STAMPS_ALLOWED = False
+
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+FRONTEND_INSTRUMENTATION = False